@@ -0,0 +1,92 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import closing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_feedbacks
+from email_feedback_app import ledger
+from email_feedback_app.utils import filter_and_process_feedbacks, is_valid_feedback
+
+
+def legacy_filter(feedback_data, processed_keys):
+    # The per-entry loop filter_and_process_feedbacks used before the grouped anti-join.
+    filtered_data = {}
+    for account, entries in feedback_data.items():
+        filtered_data[account] = []
+        for entry in entries:
+            ticket_id = str(entry.get("ticket_id"))
+            if is_valid_feedback(entry.get("message")) and (account, ticket_id) not in processed_keys:
+                filtered_data[account].append(entry)
+    return filtered_data
+
+def legacy_processed_keys():
+    # The full in-RAM (account, ticket_id) set the filter used to load on every refresh.
+    with closing(ledger.connect()) as conn:
+        return set(conn.execute("SELECT account, ticket_id FROM feedback_log").fetchall())
+
+def seed_ledger(log_rows, accounts):
+    rows = [("2025-01-01 00:00:00", f"Bench{n % accounts}", f"INC{n * 2:08d}", "u", "a", "m", "Approved")
+            for n in range(log_rows)]
+    with closing(ledger.connect()) as conn:
+        with conn:
+            conn.executemany(ledger._INSERT, rows)
+
+def traced_size(func, *args):
+    # Run separately from the timings, tracemalloc slows allocation-heavy code down.
+    tracemalloc.start()
+    result = func(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the per-entry dedupe loop with the key file anti-join.")
+    parser.add_argument("--candidates", type=int, default=500000)
+    parser.add_argument("--log-rows", type=int, default=1000000)
+    parser.add_argument("--accounts", type=int, default=40)
+    args = parser.parse_args()
+
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workspace:
+        os.chdir(workspace)
+        try:
+            seed_ledger(args.log_rows, args.accounts)
+            feedback_data = {}
+            for n, entry in enumerate(generate_feedbacks(args.candidates)):
+                feedback_data.setdefault(f"Bench{n % args.accounts}", []).append(entry)
+
+            processed_keys, set_time = timed(legacy_processed_keys)
+            _, build_time = timed(ledger.get_key_index)
+            ledger.invalidate_key_index()
+            _, index_time = timed(ledger.get_key_index)
+            expected, legacy_time = timed(legacy_filter, feedback_data, processed_keys)
+            result, grouped_time = timed(filter_and_process_feedbacks, feedback_data)
+
+            del processed_keys
+            set_bytes = traced_size(legacy_processed_keys)
+            ledger.invalidate_key_index()
+            index_bytes = traced_size(ledger.get_key_index)
+        finally:
+            os.chdir(original_cwd)
+
+    assert result == expected, "key file anti-join diverged from the per-entry loop"
+    print(f"{args.candidates} candidates x {args.log_rows} logged keys")
+    print(f"  key set load      {set_time:8.3f}s  {set_bytes / 2**20:8.1f} MiB heap")
+    print(f"  key file build    {build_time:8.3f}s (once per compaction)")
+    print(f"  key file open     {index_time:8.3f}s  {index_bytes / 2**20:8.1f} MiB heap")
+    print(f"  per-entry loop    {legacy_time:8.3f}s")
+    print(f"  key file anti-join {grouped_time:7.3f}s   x{legacy_time / grouped_time:.1f}")
+
+if __name__ == "__main__":
+    main()
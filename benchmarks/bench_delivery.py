@@ -0,0 +1,84 @@
+import argparse
+import os
+import smtplib
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.smtp_sink import SmtpSink
+from email_feedback_app.assets import load_inline_assets
+from email_feedback_app.delivery import EmlFileBackend, OutlookBackend, SmtpBackend, build_email_message
+from email_feedback_app.rendering import render_many
+
+
+def make_feedbacks(count):
+    return [{"account": "Bench", "ticket_id": f"INC{n:08d}", "user_name": f"User {n}",
+             "analyst_name": "User Test", "message": "Great support, thanks a lot!"} for n in range(count)]
+
+def deliver(backend, feedbacks, inline_assets):
+    failed = 0
+    start = time.perf_counter()
+    with backend:
+        for result in render_many(feedbacks):
+            try:
+                message = build_email_message(result["feedback"], result["subject"], result["html"],
+                                              "analyst@example.com", ["lead@example.com"], "kudos@example.com",
+                                              inline_assets)
+                backend.send(message, result["feedback"])
+            except Exception:
+                failed += 1
+    return time.perf_counter() - start, failed
+
+def connection_per_message(port, feedbacks, inline_assets):
+    # What a naive SMTP sender does: a fresh session (connect, EHLO, QUIT) for every message.
+    start = time.perf_counter()
+    for result in render_many(feedbacks):
+        message = build_email_message(result["feedback"], result["subject"], result["html"],
+                                      "analyst@example.com", ["lead@example.com"], "kudos@example.com",
+                                      inline_assets)
+        with smtplib.SMTP("127.0.0.1", port) as client:
+            client.send_message(message)
+    return time.perf_counter() - start, 0
+
+def report(name, count, elapsed, failed, extra=""):
+    print(f"{name:<28} {elapsed:8.3f}s {count / elapsed:9.0f} msg/s  failed={failed} {extra}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure delivery throughput per backend.")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--outlook", action="store_true", help="Also time Outlook drafts (Windows + pywin32).")
+    args = parser.parse_args()
+
+    original_cwd = os.getcwd()
+    os.chdir(REPO_ROOT)
+    try:
+        feedbacks = make_feedbacks(args.messages)
+        inline_assets = load_inline_assets()
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            elapsed, failed = deliver(EmlFileBackend(output_dir), feedbacks, inline_assets)
+            report("eml", args.messages, elapsed, failed)
+
+        with SmtpSink() as sink:
+            elapsed, failed = deliver(SmtpBackend("127.0.0.1", sink.port),
+                                      feedbacks, inline_assets)
+            report("smtp (reused session)", args.messages, elapsed, failed,
+                   f"connections={sink.connections} received={sink.messages}")
+
+        with SmtpSink() as sink:
+            elapsed, failed = connection_per_message(sink.port, feedbacks, inline_assets)
+            report("smtp (connection per msg)", args.messages, elapsed, failed,
+                   f"connections={sink.connections} received={sink.messages}")
+
+        if args.outlook:
+            elapsed, failed = deliver(OutlookBackend(), feedbacks, inline_assets)
+            report("outlook", args.messages, elapsed, failed)
+    finally:
+        os.chdir(original_cwd)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
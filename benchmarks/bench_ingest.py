@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import build_config, generate_workbook
+from email_feedback_app.processor import process_feedbacks, column_letter_to_index
+
+
+def legacy_process_feedbacks(filepath, account_config):
+    # Full-mode load with random sheet.cell() access, as process_feedbacks worked before streaming.
+    wb = openpyxl.load_workbook(filepath, data_only=True)
+    sheet = wb[account_config["sheet_name"]]
+    header_row = account_config["header_row"]
+    feedbacks = []
+    for row in sheet.iter_rows(min_row=header_row + 1):
+        row_num = row[0].row
+        cell = lambda letter: sheet.cell(row=row_num, column=column_letter_to_index(letter)).value
+        if cell(account_config["assignment_group"]["column"]) != account_config["assignment_group"]["required_value"]:
+            continue
+        if cell(account_config["rating_inverted"]["column"]) not in account_config["rating_inverted"]["valid_values"]:
+            continue
+        feedbacks.append({
+            "ticket_id": cell(account_config["ticket_id"]),
+            "message": cell(account_config["message"]),
+            "analyst_name": cell(account_config["analyst_name"]),
+            "user_name": cell(account_config["user_name"]),
+        })
+    return feedbacks
+
+def measure(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+
+    # Separate pass: tracemalloc inflates wall time too much to share a run with the timer.
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-mode and streaming workbook ingest.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = generate_workbook(os.path.join(tmp, "Bench.xlsx"), rows)
+            config = build_config("Bench")
+
+            legacy, legacy_time, legacy_peak = measure(legacy_process_feedbacks, path, config["accounts"]["Bench"])
+            streamed, stream_time, stream_peak = measure(process_feedbacks, path, config)
+
+            assert legacy == streamed, "streaming ingest diverged from the legacy reader"
+            print(f"{rows:>8} rows | legacy {legacy_time:7.2f}s {legacy_peak / 2**20:8.1f} MiB"
+                  f" | streaming {stream_time:7.2f}s {stream_peak / 2**20:8.1f} MiB"
+                  f" | x{legacy_time / stream_time:.1f}")
+
+if __name__ == "__main__":
+    main()
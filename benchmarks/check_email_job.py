@@ -0,0 +1,109 @@
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from email_feedback_app.delivery import MemoryBackend
+from email_feedback_app.jobs import EmailJob
+
+
+def make_feedbacks(count):
+    return [{"account": "Bench", "ticket_id": f"INC{n:08d}", "user_name": f"User {n}",
+             "analyst_name": "User Test", "message": "Great support, thanks a lot!"} for n in range(count)]
+
+def make_job(feedbacks, backend, logged, log_entries=None):
+    # Logged entries go to a list instead of the ledger, so the check never touches logs/.
+    return EmailJob(feedbacks, {}, "kudos@example.com", backend, {"render_workers": 1},
+                    log_entries=log_entries or logged.extend)
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("the job did not make progress in time")
+        time.sleep(0.005)
+
+def check_failures(count, failures):
+    feedbacks = make_feedbacks(count)
+    failed = [feedback["ticket_id"] for feedback in feedbacks[1::count // failures][:failures]]
+    logged = []
+    summary = make_job(feedbacks, MemoryBackend(fail_tickets=failed), logged).run()
+    assert summary["sent"] == count - failures, summary
+    assert summary["failed"] == failures, summary
+    assert summary["logged"] == count - failures == len(logged), summary
+    assert not {entry["ticket_id"] for entry in logged} & set(failed), "a failed message was logged"
+    assert not summary["cancelled"] and summary["error"] is None and summary["log_error"] is None, summary
+
+def check_pause(count, delay):
+    logged = []
+    job = make_job(make_feedbacks(count), MemoryBackend(delay=delay), logged)
+    job.start()
+    wait_for(lambda: job.summary["sent"] >= 5)
+    job.pause()
+    assert job.paused
+    time.sleep(delay * 5)  # let a message already in flight finish
+    sent = job.summary["sent"]
+    time.sleep(delay * 20)
+    assert job.summary["sent"] == sent, "messages were sent while paused"
+    job.resume()
+    job.join(timeout=30)
+    assert not job.is_alive()
+    assert job.summary["sent"] == job.summary["logged"] == count == len(logged), job.summary
+    events = [job.events.get_nowait()["event"] for _ in range(job.events.qsize())]
+    assert "paused" in events and "resumed" in events and events[-1] == "done", events
+
+def check_cancel(count, delay):
+    logged = []
+    job = make_job(make_feedbacks(count), MemoryBackend(delay=delay), logged)
+    job.start()
+    wait_for(lambda: job.summary["sent"] >= 30)
+    job.cancel()
+    job.join(timeout=30)
+    assert not job.is_alive()
+    summary = job.summary
+    assert summary["cancelled"], summary
+    assert 30 <= summary["sent"] < count, summary
+    assert summary["logged"] == summary["sent"] == len(logged), "a delivered message was not logged"
+
+def check_log_failure(count):
+    def fail(entries):
+        raise OSError("logs/ is unreachable")
+    summary = make_job(make_feedbacks(count), MemoryBackend(), [], log_entries=fail).run()
+    assert summary["sent"] == count and summary["logged"] == 0, summary
+    assert summary["log_error"] == "OSError: logs/ is unreachable", summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Run EmailJob headless against the in-memory backend.")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--failures", type=int, default=7)
+    parser.add_argument("--delay", type=float, default=0.005, help="Simulated send time in seconds.")
+    args = parser.parse_args()
+
+    original_cwd = os.getcwd()
+    os.chdir(REPO_ROOT)
+    try:
+        checks = [
+            ("failures", lambda: check_failures(args.messages, args.failures)),
+            ("pause/resume", lambda: check_pause(args.messages, args.delay)),
+            ("cancel", lambda: check_cancel(args.messages, args.delay)),
+            ("log failure", lambda: check_log_failure(args.messages)),
+        ]
+        failed = 0
+        for name, check in checks:
+            start = time.perf_counter()
+            try:
+                check()
+            except AssertionError as e:
+                failed += 1
+                print(f"FAIL {name}: {e}")
+                continue
+            print(f"ok   {name:<14} {time.perf_counter() - start:6.3f}s")
+    finally:
+        os.chdir(original_cwd)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
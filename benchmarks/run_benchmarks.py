@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import build_config, generate_feedbacks, generate_log, generate_workbook
+
+DEFAULT_SIZES = [1000, 10000, 100000, 500000]
+QUICK_SIZES = [1000, 10000]
+DEFAULT_LOG_SIZES = [1000, 10000, 100000]
+QUICK_LOG_SIZES = [1000, 10000]
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+RENDER_SAMPLE = 200
+SAVE_BATCH = 20
+
+
+def measure(func, track_memory=True):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+
+    peak = None
+    if track_memory:
+        # Separate pass: tracemalloc inflates wall time too much to share a run with the timer.
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"seconds": round(elapsed, 4), "peak_bytes": peak}
+
+def prepare_workspace(workspace):
+    # utils.py resolves config/, templates/ and logs/ relative to the working directory.
+    shutil.copytree(os.path.join(REPO_ROOT, "config"), os.path.join(workspace, "config"))
+    shutil.copytree(os.path.join(REPO_ROOT, "templates"), os.path.join(workspace, "templates"))
+    os.makedirs(os.path.join(workspace, "logs"), exist_ok=True)
+    os.makedirs(os.path.join(workspace, "data"), exist_ok=True)
+
+def make_display_app(feedbacks):
+    from email_feedback_app.ui import FeedbackApp
+
+    class StubTree:
+        def __init__(self):
+            self.rows = []
+
+        def get_children(self):
+            return list(range(len(self.rows)))
+
+        def delete(self, *items):
+            self.rows = []
+
+        def insert(self, parent, index, values=()):
+            self.rows.append(values)
+
+    class StubWidget:
+        def config(self, **kwargs):
+            pass
+
+    class StubVar:
+        def __init__(self, value):
+            self.value = value
+
+        def get(self):
+            return self.value
+
+    app = FeedbackApp.__new__(FeedbackApp)
+    app.tree = StubTree()
+    app.page_label = StubWidget()
+    app.selected_account = StubVar("Bench")
+    app.all_feedbacks = {"Bench": feedbacks}
+    app.analysts_config = {}
+    app.items_per_page = 20
+    app.current_page = 1
+    return app
+
+def reset_ledger(ledger, seed_log, log_path):
+    # Start each log size from an empty ledger migrated from the seed workbook.
+    for path in (ledger.LEDGER_PATH, ledger.journal_path_for(ledger.LEDGER_PATH)):
+        if os.path.exists(path):
+            os.remove(path)
+    ledger._initialized.clear()
+    ledger.invalidate_key_index()
+    shutil.copyfile(seed_log, log_path)
+    ledger.connect().close()
+
+def run_suite(sizes, log_sizes, track_memory):
+    from email_feedback_app import ledger
+    from email_feedback_app.processor import process_feedbacks
+    from email_feedback_app.utils import filter_and_process_feedbacks, render_html_template, save_to_log
+
+    results = {}
+    log_path = os.path.join("logs", "approved_feedbacks.xlsx")
+    config = build_config("Bench")
+
+    for rows in sizes:
+        path = generate_workbook(os.path.join("data", "Bench.xlsx"), rows)
+        results[f"process_feedbacks[{rows}]"] = measure(lambda: process_feedbacks(path, config), track_memory)
+
+        app = make_display_app(generate_feedbacks(rows))
+        results[f"display_feedbacks[{rows}]"] = measure(app.display_feedbacks, track_memory)
+
+    candidates = {"Bench": generate_feedbacks(max(sizes))}
+    for log_rows in log_sizes:
+        seed_log = generate_log(os.path.join("logs", f"seed_{log_rows}.xlsx"), log_rows)
+        reset_ledger(ledger, seed_log, log_path)
+        results[f"filter_and_process_feedbacks[{max(sizes)}x{log_rows}]"] = measure(
+            lambda: filter_and_process_feedbacks(candidates), track_memory)
+
+        batches = iter(range(1000))
+
+        def save_batch():
+            # A fresh account per pass so every timed call really inserts SAVE_BATCH rows.
+            save_to_log(generate_feedbacks(SAVE_BATCH, account_name=f"BenchSave{next(batches)}"))
+
+        results[f"save_to_log[{log_rows}+{SAVE_BATCH}]"] = measure(save_batch, track_memory)
+
+    sample = generate_feedbacks(RENDER_SAMPLE)
+    results[f"render_html_template[x{RENDER_SAMPLE}]"] = measure(
+        lambda: [render_html_template(fb) for fb in sample], track_memory)
+
+    return results
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("seconds"):
+            continue
+        ratio = current["seconds"] / previous["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append((name, previous["seconds"], current["seconds"], ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest, dedupe, logging and rendering hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Workbook row counts (default: 1k, 10k, 100k, 500k).")
+    parser.add_argument("--log-sizes", type=int, nargs="+", help="Log row counts (default: 1k, 10k, 100k).")
+    parser.add_argument("--quick", action="store_true", help="Only run the small sizes.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory pass.")
+    parser.add_argument("--output", help="Where to write the JSON results.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    log_sizes = args.log_sizes or (QUICK_LOG_SIZES if args.quick else DEFAULT_LOG_SIZES)
+
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workspace:
+        prepare_workspace(workspace)
+        os.chdir(workspace)
+        try:
+            results = run_suite(sizes, log_sizes, not args.no_memory)
+        finally:
+            os.chdir(original_cwd)
+
+    report = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    for name, result in results.items():
+        peak = f"{result['peak_bytes'] / 2**20:9.1f} MiB" if result["peak_bytes"] is not None else ""
+        print(f"{name:<50} {result['seconds']:10.3f}s {peak}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"[REGRESSION] {name}: {before:.3f}s -> {after:.3f}s (x{ratio:.2f})")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import socketserver
+import threading
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    # Just enough of RFC 5321 for smtplib: accepts every message and counts it, stores nothing.
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self.reply("220 kudos-sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip().upper()
+            if command.startswith("EHLO"):
+                self.wfile.write(b"250-kudos-sink\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n")
+            elif command.startswith(("HELO", "MAIL", "RCPT", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    size += len(data_line)
+                self.server.record(size)
+                self.reply("250 OK queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), _SmtpHandler)
+        self.messages = 0
+        self.bytes = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def get_request(self):
+        request = super().get_request()
+        with self._lock:
+            self.connections += 1
+        return request
+
+    def record(self, size):
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+        self.server_close()
+        return False
@@ -0,0 +1,93 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_feedback_app import ledger
+
+
+def feedback(account, ticket_id):
+    return {"account": account, "ticket_id": ticket_id, "user_name": "u", "analyst_name": "a", "message": "m"}
+
+def writer(ledger_path, writer_id, batches, batch_size, tickets, accounts, results):
+    # Every writer draws from the same ticket range, so most keys are contended by several writers.
+    rng = random.Random(writer_id)
+    written = []
+    for _ in range(batches):
+        batch = [(f"Acc{rng.randrange(accounts)}", f"INC{rng.randrange(tickets):06d}") for _ in range(batch_size)]
+        status = "Approved" if rng.random() < 0.7 else "Rejected"
+        added = ledger.append_entries([feedback(*key) for key in batch], status=status, path=ledger_path)
+        written.append((batch, added))
+        if rng.random() < 0.1:
+            ledger.compact(ledger_path)
+    results.put((writer_id, written))
+
+def compactor(ledger_path, stop, interval):
+    while not stop.wait(interval):
+        ledger.compact(ledger_path, export_xlsx=True, xlsx_path=os.path.join(os.path.dirname(ledger_path), "export.xlsx"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many writer processes against one ledger and check for lost or duplicated entries.")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--batches", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--tickets", type=int, default=2000)
+    parser.add_argument("--accounts", type=int, default=3)
+    parser.add_argument("--compact-interval", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workspace:
+        ledger_path = os.path.join(workspace, "ledger.db")
+        ledger.connect(ledger_path).close()
+
+        results = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        background = multiprocessing.Process(target=compactor, args=(ledger_path, stop, args.compact_interval))
+        writers = [multiprocessing.Process(target=writer, args=(ledger_path, n, args.batches, args.batch_size,
+                                                                args.tickets, args.accounts, results))
+                   for n in range(args.writers)]
+
+        start = time.perf_counter()
+        background.start()
+        for process in writers:
+            process.start()
+        outcomes = [results.get() for _ in writers]
+        for process in writers:
+            process.join()
+        stop.set()
+        background.join()
+        elapsed = time.perf_counter() - start
+
+        ledger.compact(ledger_path)
+        ledger.invalidate_key_index()
+        entries = ledger.load_entries(ledger_path)
+        logged = list(zip(entries["Account"], entries["TicketID"]))
+
+    attempted = {key for _, written in outcomes for batch, _ in written for key in batch}
+    reported = sum(added for _, written in outcomes for _, added in written)
+    failures = []
+    if len(logged) != len(set(logged)):
+        failures.append(f"{len(logged) - len(set(logged))} duplicated keys in the ledger")
+    if set(logged) != attempted:
+        failures.append(f"{len(attempted - set(logged))} attempted keys missing from the ledger")
+    if reported != len(logged):
+        failures.append(f"writers reported {reported} new entries but the ledger holds {len(logged)}")
+    if any(process.exitcode for process in writers + [background]):
+        failures.append("a writer or the compactor exited with an error")
+
+    appends = args.writers * args.batches
+    print(f"{args.writers} writers x {args.batches} batches of {args.batch_size} over {args.tickets * args.accounts} keys")
+    print(f"  {appends} appends in {elapsed:.2f}s ({appends / elapsed:.0f}/s), {len(logged)} distinct entries logged")
+    for failure in failures:
+        print(f"  FAIL: {failure}")
+    if not failures:
+        print("  OK: no lost or duplicated updates")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
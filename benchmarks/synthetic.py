@@ -0,0 +1,94 @@
+import os
+import random
+import openpyxl
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+# Mirrors the "Teste" entry of config/config.json.
+ACCOUNT_CONFIG = {
+    "sheet_name": "Sheet1",
+    "header_row": 3,
+    "ticket_id": "C",
+    "message": "AC",
+    "analyst_name": "BA",
+    "user_name": "AD",
+    "rating_inverted": {
+        "valid_values": [5, 6],
+        "column": "AB"
+    },
+    "assignment_group": {
+        "column": "O",
+        "required_value": "grupo teste"
+    }
+}
+
+TOTAL_COLUMNS = 81
+GROUPS = ["grupo teste", "outro grupo", "Service Desk"]
+ANALYSTS = ["User Test", "Teste", "Jane Doe", "John Smith"]
+MESSAGES = ["elogio teste", "Great support!", "n/a", ".", "Thanks a lot", None]
+
+
+def build_config(account_name, account_config=None):
+    return {"accounts": {account_name: dict(account_config or ACCOUNT_CONFIG)}}
+
+def generate_workbook(path, rows, account_config=None, seed=42):
+    account_config = account_config or ACCOUNT_CONFIG
+    rng = random.Random(seed)
+    header_row = account_config["header_row"]
+
+    columns = {
+        "ticket_id": column_index_from_string(account_config["ticket_id"]),
+        "message": column_index_from_string(account_config["message"]),
+        "analyst_name": column_index_from_string(account_config["analyst_name"]),
+        "user_name": column_index_from_string(account_config["user_name"]),
+        "rating": column_index_from_string(account_config["rating_inverted"]["column"]),
+        "group": column_index_from_string(account_config["assignment_group"]["column"]),
+    }
+
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet(account_config["sheet_name"])
+
+    for _ in range(header_row - 1):
+        sheet.append([None] * TOTAL_COLUMNS)
+    sheet.append([f"Column {get_column_letter(i)}" for i in range(1, TOTAL_COLUMNS + 1)])
+
+    for n in range(rows):
+        row = [f"filler {n}" if i % 7 == 0 else None for i in range(TOTAL_COLUMNS)]
+        row[columns["ticket_id"] - 1] = f"INC{n:08d}"
+        row[columns["message"] - 1] = rng.choice(MESSAGES)
+        row[columns["analyst_name"] - 1] = rng.choice(ANALYSTS)
+        row[columns["user_name"] - 1] = f"User {n}"
+        row[columns["rating"] - 1] = rng.randint(1, 6)
+        row[columns["group"] - 1] = rng.choice(GROUPS)
+        sheet.append(row)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    wb.save(path)
+    return path
+
+def generate_log(path, rows, account_name="Bench", seed=7):
+    import pandas as pd
+
+    rng = random.Random(seed)
+    data = pd.DataFrame({
+        "Timestamp": ["2025-01-01 00:00:00"] * rows,
+        "Account": [account_name] * rows,
+        # Every other logged ticket overlaps the generated workbook so dedupe has work to do.
+        "TicketID": [f"INC{n * 2:08d}" for n in range(rows)],
+        "UserName": [f"User {n}" for n in range(rows)],
+        "AnalystName": [rng.choice(ANALYSTS) for _ in range(rows)],
+        "Message": [rng.choice(MESSAGES[:-1]) for _ in range(rows)],
+        "Status": [rng.choice(["Approved", "Rejected"]) for _ in range(rows)],
+    })
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data.to_excel(path, index=False)
+    return path
+
+def generate_feedbacks(rows, account_name="Bench", seed=11):
+    rng = random.Random(seed)
+    return [{
+        "ticket_id": f"INC{n:08d}",
+        "message": rng.choice(MESSAGES),
+        "analyst_name": rng.choice(ANALYSTS),
+        "user_name": f"User {n}",
+        "account": account_name,
+    } for n in range(rows)]
@@ -0,0 +1,69 @@
+import hashlib
+import mimetypes
+import os
+import threading
+from email.message import EmailMessage, MIMEPart
+from typing import Dict, List, Optional, Tuple
+
+TEMPLATE_DIR = "templates"
+ASSETS = {
+    "header_img_path": os.path.join("assets", "header.png"),
+    "winner_img_path": os.path.join("assets", "Award-Winner.png"),
+}
+CID_DOMAIN = "kudos.local"
+
+_cache: Dict[str, Tuple[Tuple[int, int], "InlineAsset"]] = {}
+_lock = threading.Lock()
+
+
+class InlineAsset:
+    # One template image, read and base64-encoded once. The Content-ID is derived from the file's
+    # content hash, so an edited image gets a new CID and an unchanged one keeps it across runs.
+    def __init__(self, name: str, path: str, data: bytes):
+        self.name = name
+        self.path = os.path.abspath(path)
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        self.cid = f"{self.sha256[:16]}@{CID_DOMAIN}"
+        maintype, subtype = (mimetypes.guess_type(path)[0] or "application/octet-stream").split("/", 1)
+        self.part = MIMEPart()
+        self.part.set_content(data, maintype=maintype, subtype=subtype, cid=f"<{self.cid}>",
+                              disposition="inline", filename=os.path.basename(path))
+
+    @property
+    def src(self) -> str:
+        return f"cid:{self.cid}"
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def load_asset(name: str, path: str) -> InlineAsset:
+    abspath = os.path.abspath(path)
+    stamp = _file_stamp(abspath)
+    cached = _cache.get(abspath)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with _lock:
+        with open(abspath, "rb") as f:
+            asset = InlineAsset(name, abspath, f.read())
+        _cache[abspath] = (stamp, asset)
+    return asset
+
+def load_inline_assets(template_dir: str = TEMPLATE_DIR) -> Dict[str, InlineAsset]:
+    # Keyed by template placeholder. Files are only stat'ed on later calls and re-read if they changed.
+    return {name: load_asset(name, os.path.join(template_dir, relative)) for name, relative in ASSETS.items()}
+
+def referenced_assets(html_body: str, inline_assets: Optional[Dict[str, InlineAsset]]) -> List[InlineAsset]:
+    return [asset for asset in (inline_assets or {}).values() if asset.src in html_body]
+
+def attach_inline_assets(message: EmailMessage, html_body: str,
+                         inline_assets: Optional[Dict[str, InlineAsset]]) -> None:
+    # Turns the HTML alternative into multipart/related and appends the shared, already-encoded parts.
+    used = referenced_assets(html_body, inline_assets)
+    if not used:
+        return
+    html_part = message.get_body(preferencelist=("html",))
+    html_part.make_related()
+    for asset in used:
+        html_part.attach(asset.part)
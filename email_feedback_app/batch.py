@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import signal
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from email_feedback_app import funnel, instrumentation, ledger
+from email_feedback_app.delivery import BACKENDS, backend_from_config
+from email_feedback_app.jobs import EmailJob
+from email_feedback_app.processor import load_feedbacks_from_dir
+from email_feedback_app.utils import (
+    export_log,
+    filter_and_process_feedbacks,
+    load_analysts_config,
+    load_config,
+)
+
+EXIT_OK = 0
+EXIT_PARTIAL_FAILURE = 1
+EXIT_FATAL = 2
+
+
+def _print_progress(event: Dict[str, Any]) -> None:
+    print(json.dumps(event, default=str), flush=True)
+
+def _terminate(signum, frame) -> None:
+    # SIGTERM (e.g. a scheduler timeout) unwinds like Ctrl+C, so delivered messages still get logged.
+    raise SystemExit(EXIT_FATAL)
+
+def run_batch(config: Dict[str, Any], backend, data_dir: str = "data", accounts: Optional[Iterable[str]] = None,
+              dry_run: bool = False, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    emit = progress or (lambda event: None)
+    summary = {"candidates": 0, "sent": 0, "failed": 0, "logged": 0}
+
+    emit({"event": "stage", "stage": "ingest", "data_dir": data_dir})
+    raw_feedbacks = load_feedbacks_from_dir(data_dir, config)
+    if accounts:
+        wanted = set(accounts)
+        raw_feedbacks = {account: entries for account, entries in raw_feedbacks.items() if account in wanted}
+
+    emit({"event": "stage", "stage": "filter", "accounts": len(raw_feedbacks)})
+    filtered = filter_and_process_feedbacks(raw_feedbacks)
+    for account in filtered:
+        emit({"event": "funnel", "account": account, **funnel.get_funnel(account)})
+    funnel.write_funnel_report()
+    analysts_config = load_analysts_config()
+    sender = config.get("default_sender_email", "")
+
+    feedbacks = [dict(entry, account=account) for account, entries in filtered.items() for entry in entries]
+    summary["candidates"] = len(feedbacks)
+    emit({"event": "stage", "stage": "deliver", "candidates": len(feedbacks), "dry_run": dry_run})
+
+    if not dry_run:
+        # EmailJob logs what was delivered every LOG_EVERY messages and again on the way out, so an
+        # interrupted run (crash, Ctrl+C, SIGTERM) never re-sends already delivered messages.
+        def log_delivered(entries: List[Dict[str, Any]]) -> None:
+            emit({"event": "stage", "stage": "log", "entries": len(entries)})
+            with instrumentation.span("log.save", rows_kept=len(entries)):
+                ledger.append_entries(entries)
+
+        def forward(event: Dict[str, Any]) -> None:
+            if event["event"] == "message":
+                emit({key: value for key, value in event.items()
+                      if key != "total" and not (key in ("error", "target") and value is None)})
+
+        job = EmailJob(feedbacks, analysts_config, sender, backend, config,
+                       log_entries=log_delivered, progress=forward)
+        job.run()
+        for key in ("sent", "failed", "logged"):
+            summary[key] = job.summary[key]
+        if job.summary["log_error"]:
+            emit({"event": "error", "stage": "log", "error": job.summary["log_error"]})
+
+    emit(dict(summary, event="done", finished=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    if not dry_run and job.summary["error"]:
+        raise RuntimeError(job.summary["error"])
+    return summary
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the kudos pipeline without the GUI.")
+    parser.add_argument("--config", default="config/config.json")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--account", action="append", dest="accounts", help="Only process this account (repeatable).")
+    parser.add_argument("--backend", choices=sorted(BACKENDS),
+                        help="Delivery backend (default: delivery.backend in config.json, else eml).")
+    parser.add_argument("--output-dir", help="Destination folder for the eml backend (default: output/eml).")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many feedbacks would be processed.")
+    parser.add_argument("--quiet", action="store_true", help="Do not print JSON progress events.")
+    parser.add_argument("--export-log", action="store_true", help="Also write logs/approved_feedbacks.xlsx from the ledger.")
+    parser.add_argument("--trace", metavar="PATH", help="Write per-stage timing spans as JSON lines to PATH.")
+    parser.add_argument("--profile", metavar="PATH", help="Write a cProfile dump of the run to PATH.")
+    args = parser.parse_args(argv)
+
+    progress = None if args.quiet else _print_progress
+    compactor = None
+    try:
+        signal.signal(signal.SIGTERM, _terminate)
+    except ValueError:
+        pass  # Not called from the main thread; keep the default handler.
+    try:
+        config = load_config(args.config)
+        compactor = ledger.compactor_from_config(config)
+        compactor.run_once()
+        instrumentation.configure_from_config(config)
+        if args.trace or args.profile:
+            instrumentation.enable(args.trace or os.path.join("logs", "timings.jsonl"), args.profile)
+        backend_name = args.backend or (config.get("delivery") or {}).get("backend") or "eml"
+        backend = backend_from_config(config, name=backend_name,
+                                      **({"output_dir": args.output_dir} if args.output_dir and backend_name == "eml" else {}))
+        summary = run_batch(config, backend, data_dir=args.data_dir, accounts=args.accounts,
+                            dry_run=args.dry_run, progress=progress)
+        if args.export_log and not export_log():
+            return EXIT_PARTIAL_FAILURE
+    except Exception as e:
+        _print_progress({"event": "error", "error": f"{type(e).__name__}: {e}"})
+        return EXIT_FATAL
+    finally:
+        if compactor is not None:
+            compactor.run_once()
+        instrumentation.flush()
+
+    if summary["failed"] or (summary["sent"] and summary["logged"] != summary["sent"]):
+        return EXIT_PARTIAL_FAILURE
+    return EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
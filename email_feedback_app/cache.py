@@ -0,0 +1,90 @@
+import hashlib
+import os
+import pickle
+
+CACHE_DIR = os.path.join("cache", "feedbacks")
+CACHE_VERSION = 3
+
+
+def _entry_path(filepath, cache_dir=CACHE_DIR):
+    digest = hashlib.sha1(os.path.abspath(filepath).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{digest}.pkl")
+
+def file_content_hash(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_cache_key(filepath, config_hash, use_content_hash=False):
+    stat = os.stat(filepath)
+    return {
+        "version": CACHE_VERSION,
+        "path": os.path.abspath(filepath),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "config_hash": config_hash,
+        "content_hash": file_content_hash(filepath) if use_content_hash else None,
+    }
+
+# An entry file holds two pickles: the key first, then the rows and stats. The key alone is cheap
+# to read, so stale entries and eviction never unpickle the rows.
+def _read_key(f):
+    key = pickle.load(f)
+    if not isinstance(key, dict) or key.get("version") != CACHE_VERSION:
+        return None
+    return key
+
+def load_cached_entry(filepath, key, cache_dir=CACHE_DIR):
+    entry_path = _entry_path(filepath, cache_dir)
+    if not os.path.exists(entry_path):
+        return None
+    try:
+        with open(entry_path, "rb") as f:
+            if _read_key(f) != key:
+                return None
+            body = pickle.load(f)
+    except Exception:
+        return None
+    return {"key": key, "rows": body["rows"], "stats": body["stats"]}
+
+def store_cached_entry(filepath, key, rows, stats=None, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    entry_path = _entry_path(filepath, cache_dir)
+    tmp_path = entry_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump({"rows": rows, "stats": stats}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+    except Exception as e:
+        print(f"[!] Could not write feedback cache for {filepath}: {e}")
+
+def evict_missing_entries(cache_dir=CACHE_DIR):
+    if not os.path.isdir(cache_dir):
+        return 0
+    evicted = 0
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".pkl"):
+            # Includes *.tmp files a concurrent store_cached_entry is about to os.replace.
+            continue
+        entry_path = os.path.join(cache_dir, name)
+        try:
+            with open(entry_path, "rb") as f:
+                key = _read_key(f)
+        except Exception:
+            key = None
+        if key is None or not os.path.exists(key["path"]):
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                continue
+            evicted += 1
+    return evicted
+
+def clear_cache(cache_dir=CACHE_DIR):
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        os.remove(os.path.join(cache_dir, name))
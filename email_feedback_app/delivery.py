@@ -0,0 +1,238 @@
+import os
+import re
+import shutil
+import smtplib
+import ssl
+import tempfile
+import time
+from email.message import EmailMessage
+from email.utils import formatdate, getaddresses, make_msgid
+from typing import Any, Dict, List, Optional
+
+from email_feedback_app.assets import InlineAsset, attach_inline_assets
+
+
+def build_email_message(feedback: Dict[str, Any], subject: str, html_body: str, to: Optional[str],
+                        cc: List[str], sender: str,
+                        inline_assets: Optional[Dict[str, InlineAsset]] = None) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = sender
+    message["To"] = to or ""
+    if cc:
+        message["Cc"] = ", ".join(cc)
+    message["Date"] = formatdate(localtime=True)
+    message["Message-ID"] = make_msgid()
+    message["X-Unsent"] = "1"
+    message["X-Kudos-Account"] = str(feedback.get("account", ""))
+    message["X-Kudos-Ticket"] = str(feedback.get("ticket_id", ""))
+    message.set_content("This message requires an HTML-capable mail client.")
+    message.add_alternative(html_body, subtype="html")
+    attach_inline_assets(message, html_body, inline_assets)
+    return message
+
+
+class DeliveryBackend:
+    name = "base"
+
+    def open(self) -> None:
+        pass
+
+    def send(self, message: EmailMessage, feedback: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class EmlFileBackend(DeliveryBackend):
+    name = "eml"
+
+    def __init__(self, output_dir: str = os.path.join("output", "eml")):
+        self.output_dir = output_dir
+
+    def open(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def send(self, message: EmailMessage, feedback: Dict[str, Any]) -> str:
+        name = f"{feedback.get('account', '')}_{feedback.get('ticket_id', '')}"
+        name = re.sub(r"[^\w.-]+", "_", name).strip("_") or "message"
+        path = os.path.join(self.output_dir, f"{name}.eml")
+        counter = 1
+        while os.path.exists(path):
+            counter += 1
+            path = os.path.join(self.output_dir, f"{name}_{counter}.eml")
+        with open(path, "wb") as f:
+            f.write(message.as_bytes())
+        return path
+
+
+class OutlookBackend(DeliveryBackend):
+    # Saves each message as a draft in the local Outlook profile (Windows + pywin32 only).
+    name = "outlook"
+    PR_ATTACH_CONTENT_ID = "http://schemas.microsoft.com/mapi/proptag/0x3712001F"
+
+    def __init__(self):
+        self._outlook = None
+        self._asset_dir: Optional[str] = None
+        self._asset_paths: Dict[str, str] = {}
+
+    def open(self) -> None:
+        # COM is per thread; the backend may be opened on a background job's worker thread.
+        import pythoncom
+        import win32com.client
+        pythoncom.CoInitialize()
+        self._outlook = win32com.client.Dispatch("Outlook.Application")
+        self._asset_dir = tempfile.mkdtemp(prefix="kudos_assets_")
+
+    def _asset_path(self, part) -> str:
+        # Outlook only attaches files by path, so each inline part is written out once per batch.
+        cid = part["Content-ID"].strip("<>")
+        if cid not in self._asset_paths:
+            path = os.path.join(self._asset_dir, f"{len(self._asset_paths)}_{part.get_filename() or 'image'}")
+            with open(path, "wb") as f:
+                f.write(part.get_content())
+            self._asset_paths[cid] = path
+        return self._asset_paths[cid]
+
+    def send(self, message: EmailMessage, feedback: Dict[str, Any]) -> str:
+        mail = self._outlook.CreateItem(0)
+        mail.SentOnBehalfOfName = message["From"] or ""
+        mail.Subject = message["Subject"]
+        mail.To = "; ".join(address for _, address in getaddresses([message["To"] or ""]) if address)
+        mail.CC = "; ".join(address for _, address in getaddresses([message["Cc"] or ""]) if address)
+        mail.HTMLBody = message.get_body(preferencelist=("html",)).get_content()
+        for part in message.walk():
+            if part["Content-ID"] and part.get_content_maintype() == "image":
+                attachment = mail.Attachments.Add(self._asset_path(part))
+                attachment.PropertyAccessor.SetProperty(self.PR_ATTACH_CONTENT_ID, part["Content-ID"].strip("<>"))
+        mail.Save()
+        return "outlook:drafts"
+
+    def close(self) -> None:
+        if self._outlook is not None:
+            import pythoncom
+            self._outlook = None
+            pythoncom.CoUninitialize()
+        self._asset_paths.clear()
+        if self._asset_dir is not None:
+            shutil.rmtree(self._asset_dir, ignore_errors=True)
+            self._asset_dir = None
+
+
+class SmtpBackend(DeliveryBackend):
+    # Sends every message over one persistent SMTP session instead of one connection per message.
+    # Messages are delivered one at a time in input order, so a single session is all that is used.
+    # It is recycled after max_per_connection messages (many servers cap messages per session), and
+    # a dropped connection is reopened and the message retried once.
+    name = "smtp"
+
+    def __init__(self, host: str = "localhost", port: int = 25, username: Optional[str] = None,
+                 password: Optional[str] = None, starttls: bool = False, use_ssl: bool = False,
+                 timeout: float = 30, max_per_connection: int = 100):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.max_per_connection = max_per_connection
+        self._client: Optional[smtplib.SMTP] = None
+        self._sent = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            client = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            client = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                client.starttls(context=ssl.create_default_context())
+        if self.username:
+            client.login(self.username, self.password or "")
+        return client
+
+    def _disconnect(self) -> None:
+        client, self._client, self._sent = self._client, None, 0
+        if client is None:
+            return
+        try:
+            client.quit()
+        except OSError:  # includes SMTPException; the session is already dead
+            pass
+        finally:
+            client.close()
+
+    def send(self, message: EmailMessage, feedback: Dict[str, Any]) -> str:
+        recipients = [address for _, address in getaddresses([message["To"] or "", message["Cc"] or ""]) if address]
+        if not recipients:
+            raise ValueError(f"No recipient address for analyst {feedback.get('analyst_name')!r}")
+        del message["X-Unsent"]
+        for attempt in range(2):
+            if self._client is None:
+                self._client = self._connect()
+            try:
+                self._client.send_message(message, to_addrs=recipients)
+                break
+            except smtplib.SMTPServerDisconnected:
+                self._disconnect()
+                if attempt:
+                    raise
+        self._sent += 1
+        if self._sent >= self.max_per_connection:
+            self._disconnect()
+        return f"smtp://{self.host}:{self.port}"
+
+    def close(self) -> None:
+        self._disconnect()
+
+
+class MemoryBackend(DeliveryBackend):
+    # Keeps messages in memory instead of delivering them, for exercising EmailJob and the pipeline
+    # in checks and benchmarks. Not registered in BACKENDS: callers log every "sent" message as
+    # Approved, which would permanently dedupe tickets nobody received. Pass an instance directly.
+    # fail_tickets makes send fail for those ticket IDs; delay simulates a slow server.
+    name = "memory"
+
+    def __init__(self, delay: float = 0.0, fail_tickets: Optional[List[str]] = None):
+        self.delay = delay
+        self.fail_tickets = {str(ticket_id) for ticket_id in fail_tickets or []}
+        self.messages: List[EmailMessage] = []
+
+    def send(self, message: EmailMessage, feedback: Dict[str, Any]) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        if str(feedback.get("ticket_id")) in self.fail_tickets:
+            raise RuntimeError(f"Simulated delivery failure for {feedback.get('ticket_id')}")
+        self.messages.append(message)
+        return f"memory:{len(self.messages)}"
+
+
+BACKENDS = {
+    EmlFileBackend.name: EmlFileBackend,
+    OutlookBackend.name: OutlookBackend,
+    SmtpBackend.name: SmtpBackend,
+}
+
+def create_backend(name: str, **options) -> DeliveryBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown delivery backend: {name}")
+    return BACKENDS[name](**options)
+
+def backend_from_config(config: Dict[str, Any], default: str = "eml", name: Optional[str] = None,
+                        **overrides) -> DeliveryBackend:
+    # "delivery": {"backend": "smtp", "smtp": {"host": ..., "port": ...}} in config.json; the options
+    # under the backend's own key are passed to its constructor.
+    settings = config.get("delivery") or {}
+    name = name or settings.get("backend") or default
+    options = dict(settings.get(name) or {})
+    options.update(overrides)
+    return create_backend(name, **options)
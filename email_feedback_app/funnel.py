@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+INGEST_RULES = ("assignment_group", "rating")
+FUNNEL_REPORT_PATH = os.path.join("logs", "funnel.json")
+
+_funnels: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def _empty_funnel() -> Dict[str, Any]:
+    return {
+        "rows_read": 0,
+        "rejected": {rule: 0 for rule in INGEST_RULES + ("message",)},
+        "deduped": 0,
+        "shown": 0,
+    }
+
+def new_ingest_stats() -> Dict[str, Any]:
+    return {"rows_read": 0, "rejected": {rule: 0 for rule in INGEST_RULES}}
+
+def record_ingest(account: str, stats: Optional[Dict[str, Any]]) -> None:
+    if not stats:
+        return
+    with _lock:
+        funnel = _empty_funnel()
+        funnel["rows_read"] = stats["rows_read"]
+        funnel["rejected"].update(stats["rejected"])
+        _funnels[account] = funnel
+
+def record_dedupe(account: str, candidates: int, invalid_message: int, deduped: int, shown: int) -> None:
+    with _lock:
+        funnel = _funnels.setdefault(account, _empty_funnel())
+        if not funnel["rows_read"]:
+            funnel["rows_read"] = candidates
+        funnel["rejected"]["message"] = invalid_message
+        funnel["deduped"] = deduped
+        funnel["shown"] = shown
+
+def get_funnel(account: str) -> Dict[str, Any]:
+    with _lock:
+        funnel = _funnels.get(account)
+        return json.loads(json.dumps(funnel)) if funnel else _empty_funnel()
+
+def get_all_funnels() -> Dict[str, Dict[str, Any]]:
+    with _lock:
+        return json.loads(json.dumps(_funnels))
+
+def reset_funnels() -> None:
+    with _lock:
+        _funnels.clear()
+
+def format_funnel(account: str) -> str:
+    funnel = get_funnel(account)
+    rejected = funnel["rejected"]
+    return (f"Rows read: {funnel['rows_read']}  |  Group filter: -{rejected['assignment_group']}"
+            f"  |  Rating filter: -{rejected['rating']}  |  Empty message: -{rejected['message']}"
+            f"  |  Already logged: -{funnel['deduped']}  |  Shown: {funnel['shown']}")
+
+def write_funnel_report(path: str = FUNNEL_REPORT_PATH) -> None:
+    report = {
+        "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "accounts": get_all_funnels(),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
@@ -0,0 +1,129 @@
+import atexit
+import cProfile
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+_enabled = False
+_records: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_output_path: Optional[str] = None
+_profile_path: Optional[str] = None
+_profiler: Optional[cProfile.Profile] = None
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add(self, **counters):
+        pass
+
+
+class Span:
+    def __init__(self, stage: str, account: Optional[str], counters: Dict[str, Any]):
+        self.stage = stage
+        self.account = account
+        self.counters = dict(counters)
+
+    def add(self, **counters):
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = {
+            "stage": self.stage,
+            "account": self.account,
+            "wall_s": round(time.perf_counter() - self._wall, 6),
+            "cpu_s": round(time.thread_time() - self._cpu, 6),
+            "pid": os.getpid(),
+            "ts": time.time(),
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        record.update(self.counters)
+        with _lock:
+            _records.append(record)
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+def span(stage: str, account: Optional[str] = None, **counters):
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(stage, account, counters)
+
+def is_enabled() -> bool:
+    return _enabled
+
+def enable(output_path: Optional[str] = None, profile_path: Optional[str] = None) -> None:
+    global _enabled, _output_path, _profile_path, _profiler
+    _enabled = True
+    _output_path = output_path
+    if profile_path and _profiler is None:
+        _profile_path = profile_path
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+def disable() -> None:
+    global _enabled
+    flush()
+    _enabled = False
+
+def configure_from_config(config: Dict[str, Any]) -> None:
+    settings = config.get("instrumentation") or {}
+    if os.environ.get("KUDOS_TRACE"):
+        settings = dict(settings, enabled=True)
+    if settings.get("enabled"):
+        enable(settings.get("path", os.path.join("logs", "timings.jsonl")), settings.get("profile"))
+
+def drain() -> List[Dict[str, Any]]:
+    with _lock:
+        records = list(_records)
+        _records.clear()
+    return records
+
+def record_many(records: List[Dict[str, Any]]) -> None:
+    if not _enabled or not records:
+        return
+    with _lock:
+        _records.extend(records)
+
+def flush() -> None:
+    global _profiler
+    records = drain()
+    if records and _output_path:
+        os.makedirs(os.path.dirname(os.path.abspath(_output_path)), exist_ok=True)
+        with open(_output_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+    if _profiler is not None:
+        _profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(_profile_path)), exist_ok=True)
+        _profiler.dump_stats(_profile_path)
+        _profiler = None
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    summary: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        key = f"{record['stage']}[{record['account']}]" if record.get("account") else record["stage"]
+        totals = summary.setdefault(key, {"count": 0})
+        totals["count"] += 1
+        for name, value in record.items():
+            if name in ("stage", "account", "pid", "ts", "error") or not isinstance(value, (int, float)):
+                continue
+            totals[name] = totals.get(name, 0) + value
+    return summary
+
+atexit.register(lambda: _enabled and flush())
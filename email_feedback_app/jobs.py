@@ -0,0 +1,117 @@
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from email_feedback_app import ledger
+from email_feedback_app.delivery import DeliveryBackend
+from email_feedback_app.utils import deliver_many
+
+LOG_EVERY = 25
+
+
+class EmailJob:
+    # Renders, delivers and logs a list of feedbacks on a worker thread. Progress is pushed to
+    # self.events as dicts ("start", "message", "paused", "resumed", "done") for the caller to poll,
+    # or handed to progress instead when given; run() can also be called directly for a synchronous,
+    # headless run. Delivered messages are
+    # logged every LOG_EVERY messages and at the end, so a cancelled or crashed job never loses them.
+    def __init__(self, feedbacks: List[Dict[str, Any]], analysts_config: Dict[str, Any], sender: str,
+                 backend: DeliveryBackend, config: Optional[Dict[str, Any]] = None, log: bool = True,
+                 log_entries: Callable[[List[Dict[str, Any]]], Any] = ledger.append_entries,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.feedbacks = feedbacks
+        self.analysts_config = analysts_config
+        self.sender = sender
+        self.backend = backend
+        self.config = config
+        self.log = log
+        self.log_entries = log_entries
+        self.progress = progress
+        self.events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self.summary = {"total": len(feedbacks), "sent": 0, "failed": 0, "logged": 0, "cancelled": False,
+                        "error": None, "log_error": None}
+        self._cancel = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self._thread: Optional[threading.Thread] = None
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        if self.progress is not None:
+            self.progress(event)
+        else:
+            self.events.put(event)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="email-job", daemon=True)
+            self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+        self._running.set()
+
+    def pause(self) -> None:
+        if self._running.is_set() and not self._cancel.is_set():
+            self._running.clear()
+            self._emit({"event": "paused"})
+
+    def resume(self) -> None:
+        if not self._running.is_set():
+            self._running.set()
+            self._emit({"event": "resumed"})
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _flush_log(self, delivered: List[Dict[str, Any]]) -> None:
+        # Errors are recorded rather than reported: report_error may show a Tk dialog, which must not
+        # happen off the main thread. Unlogged entries stay queued for the next flush.
+        if not self.log or not delivered:
+            return
+        try:
+            self.log_entries(delivered)
+        except Exception as e:
+            self.summary["log_error"] = f"{type(e).__name__}: {e}"
+            return
+        self.summary["logged"] += len(delivered)
+        delivered.clear()
+
+    def run(self) -> Dict[str, Any]:
+        self._emit({"event": "start", "total": len(self.feedbacks)})
+        delivered: List[Dict[str, Any]] = []
+        try:
+            with self.backend:
+                for outcome in deliver_many(self.feedbacks, self.analysts_config, self.sender, self.backend,
+                                            self.config):
+                    feedback = outcome["feedback"]
+                    if outcome["error"]:
+                        self.summary["failed"] += 1
+                    else:
+                        self.summary["sent"] += 1
+                        delivered.append(feedback)
+                    self._emit({"event": "message", "index": outcome["index"] + 1, "total": len(self.feedbacks),
+                                     "account": feedback["account"], "ticket_id": feedback["ticket_id"],
+                                     "ok": not outcome["error"], "error": outcome["error"],
+                                     "target": outcome["target"]})
+                    if len(delivered) >= LOG_EVERY:
+                        self._flush_log(delivered)
+                    # Pause and cancel take effect between messages; a message is never half-sent.
+                    self._running.wait()
+                    if self._cancel.is_set():
+                        self.summary["cancelled"] = True
+                        break
+        except Exception as e:
+            self.summary["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            self._flush_log(delivered)
+            self._emit(dict(self.summary, event="done", finished=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        return self.summary
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import re
+import struct
+from typing import Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from email_feedback_app.locking import atomic_replace, temp_path_for
+
+MAGIC = b"KUDOSKY1"
+_HEADER = struct.Struct("<8sQQ")
+KEY_DTYPE = np.dtype("<u8")
+KEY_SEPARATOR = "\x1f"
+
+
+def key_digest(account: str, ticket_id: str) -> bytes:
+    return hashlib.blake2b(f"{account}{KEY_SEPARATOR}{ticket_id}".encode("utf-8"), digest_size=8).digest()
+
+def key_hash(account: str, ticket_id: str) -> int:
+    return int.from_bytes(key_digest(account, ticket_id), "little")
+
+def hash_keys(keys: Iterable[Tuple[str, str]]) -> np.ndarray:
+    return np.frombuffer(b"".join(key_digest(account, ticket_id) for account, ticket_id in keys), dtype=KEY_DTYPE)
+
+def keyfile_path(ledger_path: str, max_id: int) -> str:
+    return f"{os.path.splitext(ledger_path)[0]}.{max_id}.keys"
+
+def list_keyfiles(ledger_path: str) -> List[Tuple[int, str]]:
+    directory = os.path.dirname(os.path.abspath(ledger_path))
+    prefix = os.path.basename(os.path.splitext(ledger_path)[0])
+    pattern = re.compile(rf"{re.escape(prefix)}\.(\d+)\.keys$")
+    found = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(found)
+
+def write_keyfile(path: str, max_id: int, sorted_hashes: np.ndarray) -> None:
+    tmp_path = temp_path_for(path)
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, max_id, len(sorted_hashes)))
+        f.write(np.ascontiguousarray(sorted_hashes, dtype=KEY_DTYPE).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    atomic_replace(tmp_path, path)
+
+def open_keyfile(path: str) -> Tuple[int, np.ndarray]:
+    with open(path, "rb") as f:
+        magic, max_id, count = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a key file")
+    if count == 0:
+        return max_id, np.empty(0, dtype=KEY_DTYPE)
+    return max_id, np.memmap(path, dtype=KEY_DTYPE, mode="r", offset=_HEADER.size, shape=(count,))
+
+def remove_stale_keyfiles(ledger_path: str, keep: str) -> None:
+    for _, path in list_keyfiles(ledger_path):
+        if os.path.abspath(path) != os.path.abspath(keep):
+            try:
+                os.remove(path)
+            except OSError:
+                # Still mapped by another reader (Windows); the next sync retries.
+                pass
+
+
+class KeyIndex:
+    # Sorted 64-bit key hashes memory-mapped from disk, plus a small in-memory delta for writes
+    # that are not folded into the snapshot yet. A 64-bit hash collision is the only false positive.
+    def __init__(self, hashes: np.ndarray, max_id: int, delta: Optional[Set[int]] = None):
+        self.hashes = hashes
+        self.max_id = max_id
+        self.delta = delta or set()
+
+    def __len__(self) -> int:
+        return len(self.hashes) + len(self.delta)
+
+    def _in_snapshot(self, hashes: np.ndarray) -> np.ndarray:
+        if not len(self.hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.searchsorted(self.hashes, hashes)
+        positions[positions == len(self.hashes)] = len(self.hashes) - 1
+        return self.hashes[positions] == hashes
+
+    def contains(self, account: str, ticket_id: str) -> bool:
+        return bool(self.contains_many(account, [ticket_id])[0])
+
+    def contains_many(self, account: str, ticket_ids: Iterable[str]) -> np.ndarray:
+        hashes = hash_keys((account, ticket_id) for ticket_id in ticket_ids)
+        found = self._in_snapshot(hashes)
+        if self.delta:
+            found |= np.fromiter(map(self.delta.__contains__, hashes.tolist()), dtype=bool, count=len(hashes))
+        return found
+
+    def add(self, keys: Iterable[Tuple[str, str]]) -> None:
+        self.delta.update(hash_keys(keys).tolist())
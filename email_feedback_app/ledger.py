@@ -0,0 +1,726 @@
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import closing, contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from email_feedback_app import locking
+from email_feedback_app.keyfile import (
+    KeyIndex,
+    hash_keys,
+    keyfile_path,
+    list_keyfiles,
+    open_keyfile,
+    remove_stale_keyfiles,
+    write_keyfile,
+)
+
+LOG_DIR = "logs"
+LEDGER_PATH = os.path.join(LOG_DIR, "ledger.db")
+LOG_XLSX_PATH = os.path.join(LOG_DIR, "approved_feedbacks.xlsx")
+KEYFILE_CHUNK = 50000
+LOG_COLUMNS = ["Timestamp", "Account", "TicketID", "UserName", "AnalystName", "Message", "Status"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    account TEXT NOT NULL,
+    ticket_id TEXT NOT NULL,
+    user_name TEXT,
+    analyst_name TEXT,
+    message TEXT,
+    status TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_feedback_log_key ON feedback_log (account, ticket_id);
+CREATE INDEX IF NOT EXISTS ix_feedback_log_timestamp ON feedback_log (timestamp);
+CREATE TABLE IF NOT EXISTS ledger_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS feedback_rollup (
+    account TEXT NOT NULL,
+    analyst_name TEXT NOT NULL,
+    month TEXT NOT NULL,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (account, analyst_name, month, status)
+);
+CREATE TRIGGER IF NOT EXISTS tr_feedback_log_rollup AFTER INSERT ON feedback_log
+BEGIN
+    INSERT INTO feedback_rollup (account, analyst_name, month, status, count)
+    VALUES (NEW.account, COALESCE(NEW.analyst_name, ''),
+            CASE WHEN NEW.timestamp GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' THEN substr(NEW.timestamp, 1, 7)
+                 ELSE 'undated' END,
+            NEW.status, 1)
+    ON CONFLICT (account, analyst_name, month, status) DO UPDATE SET count = count + 1;
+END;
+"""
+
+_ROLLUP_BACKFILL = """
+INSERT INTO feedback_rollup (account, analyst_name, month, status, count)
+SELECT account, COALESCE(analyst_name, ''),
+       CASE WHEN timestamp GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*' THEN substr(timestamp, 1, 7) ELSE 'undated' END,
+       status, COUNT(*)
+FROM feedback_log GROUP BY 1, 2, 3, 4
+"""
+
+ROLLUP_COLUMNS = ["Account", "AnalystName", "Month", "Status", "Count"]
+
+_INSERT = """
+INSERT OR IGNORE INTO feedback_log (timestamp, account, ticket_id, user_name, analyst_name, message, status)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_MONTH = re.compile(r"\d{4}-\d{2}$")
+UNDATED_MONTH = "undated"
+
+_JOURNAL_FIELDS = ("timestamp", "account", "ticket_id", "user_name", "analyst_name", "message", "status")
+
+_initialized: Set[str] = set()
+_journal_lock = threading.RLock()
+_lock_depth: Dict[str, int] = {}
+_key_index: Dict[str, Any] = {"path": None, "stamp": None, "index": None}
+_key_index_lock = threading.Lock()
+_pending_keys: Dict[Tuple[str, str], int] = {}
+
+
+def normalize_ticket_id(ticket_id: Any) -> str:
+    return str(ticket_id)
+
+def _clean(value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value if isinstance(value, (str, int, float)) else str(value)
+
+def connect(path: str = LEDGER_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    abspath = os.path.abspath(path)
+    is_new = not os.path.exists(path)
+    conn = sqlite3.connect(path, timeout=30)
+    if is_new or abspath not in _initialized:
+        with ledger_lock(path):
+            conn.executescript(_SCHEMA)
+            _migrate_xlsx(conn, os.path.join(os.path.dirname(path), os.path.basename(LOG_XLSX_PATH)))
+            _backfill_rollups(conn)
+        _initialized.add(abspath)
+    return conn
+
+def lock_path_for(path: str = LEDGER_PATH) -> str:
+    return os.path.splitext(path)[0] + ".lock"
+
+@contextmanager
+def ledger_lock(path: str = LEDGER_PATH) -> Iterator[None]:
+    # Serializes ledger writers across threads (RLock) and across processes sharing the logs folder
+    # (advisory lock file). Re-entrant within a thread, so nested ledger calls do not deadlock.
+    abspath = os.path.abspath(path)
+    with _journal_lock:
+        outer = not _lock_depth.get(abspath)
+        with locking.file_lock(lock_path_for(path)) if outer else nullcontext():
+            _lock_depth[abspath] = _lock_depth.get(abspath, 0) + 1
+            try:
+                yield
+            finally:
+                _lock_depth[abspath] -= 1
+
+def _migrate_xlsx(conn: sqlite3.Connection, xlsx_path: str) -> int:
+    # One-time import of the legacy approved_feedbacks.xlsx; afterwards the xlsx is only an export.
+    if conn.execute("SELECT value FROM ledger_meta WHERE key = 'xlsx_migrated'").fetchone():
+        return 0
+    imported = 0
+    if os.path.exists(xlsx_path):
+        log_df = pd.read_excel(xlsx_path)
+        if not log_df.empty:
+            rows = [(
+                _clean(row.get("Timestamp")) or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                str(row.get("Account")),
+                normalize_ticket_id(row.get("TicketID")),
+                _clean(row.get("UserName")),
+                _clean(row.get("AnalystName")),
+                _clean(row.get("Message")),
+                _clean(row.get("Status")) or "Approved",
+            ) for row in log_df.to_dict("records")]
+            # rowcount, not total_changes: the latter also counts the rollup trigger's writes.
+            imported = conn.executemany(_INSERT, rows).rowcount
+    conn.execute("INSERT OR REPLACE INTO ledger_meta (key, value) VALUES ('xlsx_migrated', ?)",
+                 (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),))
+    conn.commit()
+    if imported:
+        print(f"[i] Migrated {imported} log entries from {xlsx_path} to the ledger.")
+    return imported
+
+def _backfill_rollups(conn: sqlite3.Connection) -> None:
+    # Ledgers created before the rollup table existed are counted once; from then on the insert
+    # trigger keeps the counts current, including for rows that are later archived.
+    if conn.execute("SELECT value FROM ledger_meta WHERE key = 'rollup_built'").fetchone():
+        return
+    with conn:
+        conn.execute("DELETE FROM feedback_rollup")
+        conn.execute(_ROLLUP_BACKFILL)
+        conn.execute("INSERT OR REPLACE INTO ledger_meta (key, value) VALUES ('rollup_built', ?)",
+                     (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),))
+
+def journal_path_for(path: str = LEDGER_PATH) -> str:
+    return os.path.splitext(path)[0] + ".journal.jsonl"
+
+def _read_journal(path: str) -> Tuple[List[Dict[str, Any]], int]:
+    # Returns the complete entries and the byte length they span; a torn trailing line is ignored.
+    journal = journal_path_for(path)
+    entries = []
+    valid_bytes = 0
+    if not os.path.exists(journal):
+        return entries, valid_bytes
+    with open(journal, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+            valid_bytes += len(line)
+    return entries, valid_bytes
+
+def _repair_journal_tail(path: str) -> None:
+    # After a crash mid-write the journal may end in a partial line; cut it before appending again.
+    journal = journal_path_for(path)
+    if not os.path.exists(journal) or os.path.getsize(journal) == 0:
+        return
+    with open(journal, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+    _, valid_bytes = _read_journal(path)
+    print(f"[!] Discarded an incomplete trailing write in {journal}.")
+    with open(journal, "r+b") as f:
+        f.truncate(valid_bytes)
+        os.fsync(f.fileno())
+
+def _entry_row(entry: Dict[str, Any]) -> Tuple:
+    return tuple(entry[field] for field in _JOURNAL_FIELDS)
+
+def append_entries(feedbacks: Iterable[Dict[str, Any]], status: str = "Approved",
+                   path: str = LEDGER_PATH) -> int:
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    candidates = {}
+    for fb in feedbacks:
+        key = (str(fb["account"]), normalize_ticket_id(fb["ticket_id"]))
+        if key not in candidates:
+            candidates[key] = fb
+    if not candidates:
+        return 0
+
+    journal = journal_path_for(path)
+    os.makedirs(os.path.dirname(os.path.abspath(journal)), exist_ok=True)
+    with ledger_lock(path):
+        # The dedupe check runs under the lock against a fresh index, so two reviewers saving the
+        # same ticket at once cannot both log it.
+        known = get_key_index(path)
+        entries = [{
+            "timestamp": timestamp,
+            "account": key[0],
+            "ticket_id": key[1],
+            "user_name": _clean(fb["user_name"]),
+            "analyst_name": _clean(fb["analyst_name"]),
+            "message": _clean(fb["message"]),
+            "status": status,
+        } for key, fb in candidates.items() if not known.contains(*key)]
+        if not entries:
+            return 0
+        batch_keys = [(entry["account"], entry["ticket_id"]) for entry in entries]
+        payload = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode("utf-8")
+        _repair_journal_tail(path)
+        with open(journal, "ab") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        _update_key_index(path, batch_keys)
+    return len(entries)
+
+def _fold(conn: sqlite3.Connection, entries: List[Dict[str, Any]]) -> int:
+    with conn:
+        return conn.executemany(_INSERT, [_entry_row(entry) for entry in entries]).rowcount
+
+def compact(path: str = LEDGER_PATH, export_xlsx: bool = False, xlsx_path: str = LOG_XLSX_PATH,
+            horizon_months: Optional[int] = None) -> int:
+    # Folds the journal into the SQLite snapshot. Replaying is idempotent (INSERT OR IGNORE), so a
+    # crash between the commit and the truncate only means the same lines are folded again next time.
+    with ledger_lock(path):
+        archive(path, horizon_months)
+        entries, valid_bytes = _read_journal(path)
+        journal = journal_path_for(path)
+        folded = 0
+        with closing(connect(path)) as conn:
+            if entries:
+                folded = locking.retry(_fold, conn, entries, exceptions=(sqlite3.OperationalError,))
+            if os.path.exists(journal):
+                if os.path.getsize(journal) != valid_bytes:
+                    print(f"[!] Discarded an incomplete trailing write in {journal}.")
+                with open(journal, "r+b") as f:
+                    f.truncate(0)
+                    os.fsync(f.fileno())
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM feedback_log").fetchone()[0]
+            exported = conn.execute("SELECT value FROM ledger_meta WHERE key = 'exported_id'").fetchone()
+        if folded:
+            sync_keyfile(path)
+            invalidate_key_index()
+        else:
+            _refresh_key_index_stamp(path)
+
+    if export_xlsx and (exported is None or int(exported[0]) != max_id or not os.path.exists(xlsx_path)):
+        export_to_xlsx(xlsx_path, path)
+    return folded
+
+def _in_months(month: str, since: Optional[str], until: Optional[str]) -> bool:
+    if not since and not until:
+        return True
+    return month != UNDATED_MONTH and not (since and month < since) and not (until and month > until)
+
+def load_rollups(path: str = LEDGER_PATH, accounts: Optional[Iterable[str]] = None,
+                 since: Optional[str] = None, until: Optional[str] = None,
+                 status: Optional[str] = None) -> pd.DataFrame:
+    # Kudos counts per account, analyst, month and status, read from the rollup table instead of
+    # the log. Entries still in the journal are added on top; since/until are inclusive "YYYY-MM".
+    # Undated entries have no month to compare, so any date bound excludes them.
+    clauses, params = [], []
+    if accounts is not None:
+        accounts = list(accounts)
+        clauses.append(f"account IN ({', '.join('?' for _ in accounts)})")
+        params.extend(accounts)
+    if since or until:
+        clauses.append("month <> ?")
+        params.append(UNDATED_MONTH)
+    if since:
+        clauses.append("month >= ?")
+        params.append(since)
+    if until:
+        clauses.append("month <= ?")
+        params.append(until)
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    with ledger_lock(path), closing(connect(path)) as conn:
+        counts = {tuple(row[:4]): row[4] for row in conn.execute(
+            f"SELECT account, analyst_name, month, status, count FROM feedback_rollup{where}", params)}
+        for entry in _read_journal(path)[0]:
+            month = _entry_month(entry["timestamp"])
+            if ((accounts is not None and entry["account"] not in accounts) or not _in_months(month, since, until)
+                    or (status and entry["status"] != status)):
+                continue
+            if conn.execute("SELECT 1 FROM feedback_log WHERE account = ? AND ticket_id = ?",
+                            (entry["account"], entry["ticket_id"])).fetchone():
+                continue
+            analyst = "" if entry["analyst_name"] is None else str(entry["analyst_name"])
+            key = (entry["account"], analyst, month, entry["status"])
+            counts[key] = counts.get(key, 0) + 1
+    return pd.DataFrame([key + (count,) for key, count in sorted(counts.items())], columns=ROLLUP_COLUMNS)
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _ledger_stamp(path: str) -> Optional[Tuple]:
+    db_stamp = _file_stamp(path)
+    if db_stamp is None:
+        return None
+    return db_stamp, _file_stamp(journal_path_for(path))
+
+def _update_key_index(path: str, keys: Iterable[Tuple[str, str]]) -> None:
+    with _key_index_lock:
+        if _key_index["path"] != os.path.abspath(path) or _key_index["stamp"] is None:
+            return
+        _key_index["index"].add(keys)
+        _key_index["stamp"] = _ledger_stamp(path)
+
+def _refresh_key_index_stamp(path: str) -> None:
+    with _key_index_lock:
+        if _key_index["path"] == os.path.abspath(path) and _key_index["stamp"] is not None:
+            _key_index["stamp"] = _ledger_stamp(path)
+
+def sync_keyfile(path: str = LEDGER_PATH, rebuild: bool = False) -> str:
+    # Makes sure a sorted key file exists for the snapshot's current MAX(id). It starts from the
+    # newest older key file and only hashes the rows added since, so a rebuild is incremental.
+    # Archiving deletes rows, which an incremental sync cannot express; it passes rebuild=True.
+    with ledger_lock(path), closing(connect(path)) as conn:
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM feedback_log").fetchone()[0]
+        target = keyfile_path(path, max_id)
+        if os.path.exists(target) and not rebuild:
+            remove_stale_keyfiles(path, target)
+            return target
+
+        base_id, base = 0, np.empty(0, dtype=np.uint64)
+        older = [(file_id, file_path) for file_id, file_path in list_keyfiles(path) if file_id < max_id]
+        if older and not rebuild:
+            try:
+                base_id, base = open_keyfile(older[-1][1])
+            except (OSError, ValueError):
+                base_id, base = 0, np.empty(0, dtype=np.uint64)
+
+        chunks = [np.asarray(base)]
+        cursor = conn.execute("SELECT account, ticket_id FROM feedback_log WHERE id > ?", (base_id,))
+        while True:
+            rows = cursor.fetchmany(KEYFILE_CHUNK)
+            if not rows:
+                break
+            chunks.append(hash_keys(rows))
+        write_keyfile(target, max_id, np.unique(np.concatenate(chunks)))
+        del base, chunks
+        remove_stale_keyfiles(path, target)
+    return target
+
+def get_key_index(path: str = LEDGER_PATH) -> KeyIndex:
+    # Long-lived dedupe index: the snapshot's keys stay on disk (memory-mapped) and only the
+    # journal's keys live in RAM. It is reopened only when the ledger files changed on disk.
+    abspath = os.path.abspath(path)
+    with _key_index_lock:
+        stamp = _ledger_stamp(path)
+        if _key_index["path"] == abspath and stamp is not None and _key_index["stamp"] == stamp:
+            return _key_index["index"]
+    # Reloading under the lock keeps the key file, journal and stamp from one consistent moment.
+    with ledger_lock(path):
+        max_id, hashes = open_keyfile(sync_keyfile(path))
+        index = KeyIndex(hashes, max_id)
+        index.add((entry["account"], entry["ticket_id"]) for entry in _read_journal(path)[0])
+        with _key_index_lock:
+            _key_index.update(path=abspath, stamp=_ledger_stamp(path), index=index)
+    return index
+
+def _hold_pending(keys: Iterable[Tuple[str, str]]) -> None:
+    with _key_index_lock:
+        for key in keys:
+            _pending_keys[key] = _pending_keys.get(key, 0) + 1
+
+def _release_pending(keys: Iterable[Tuple[str, str]]) -> None:
+    with _key_index_lock:
+        for key in keys:
+            count = _pending_keys.get(key, 0) - 1
+            if count > 0:
+                _pending_keys[key] = count
+            else:
+                _pending_keys.pop(key, None)
+
+def pending_ticket_ids(account: str) -> Set[str]:
+    # Keys held by a write-behind buffer that are not in the journal yet. They are kept apart from
+    # the key index because append_entries would otherwise drop them as already logged.
+    with _key_index_lock:
+        return {ticket_id for pending_account, ticket_id in _pending_keys if pending_account == account}
+
+def invalidate_key_index() -> None:
+    with _key_index_lock:
+        _key_index.update(path=None, stamp=None, index=None)
+
+def load_entries(path: str = LEDGER_PATH) -> pd.DataFrame:
+    # Snapshot and journal are read under the lock so a concurrent compaction cannot hide rows.
+    with ledger_lock(path), closing(connect(path)) as conn:
+        rows = conn.execute("SELECT timestamp, account, ticket_id, user_name, analyst_name, message, status "
+                            "FROM feedback_log ORDER BY id").fetchall()
+        journal_entries = _read_journal(path)[0]
+    seen = {(row[1], row[2]) for row in rows}
+    for entry in journal_entries:
+        key = (entry["account"], entry["ticket_id"])
+        if key not in seen:
+            seen.add(key)
+            rows.append(_entry_row(entry))
+    return pd.DataFrame(rows, columns=LOG_COLUMNS)
+
+def export_to_xlsx(xlsx_path: str = LOG_XLSX_PATH, path: str = LEDGER_PATH) -> int:
+    with ledger_lock(path):
+        with closing(connect(path)) as conn:
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM feedback_log").fetchone()[0]
+        entries = load_entries(path)
+    os.makedirs(os.path.dirname(os.path.abspath(xlsx_path)), exist_ok=True)
+    # Write next to the target and swap it in, so a crash never leaves a half-written workbook.
+    tmp_path = locking.temp_path_for(xlsx_path, ".tmp.xlsx")
+    try:
+        entries.to_excel(tmp_path, index=False)
+        locking.atomic_replace(tmp_path, xlsx_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if os.path.abspath(xlsx_path) == os.path.abspath(LOG_XLSX_PATH):
+        with closing(connect(path)) as conn:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO ledger_meta (key, value) VALUES ('exported_id', ?)", (str(max_id),))
+    return len(entries)
+
+def archive_dir_for(path: str = LEDGER_PATH) -> str:
+    return os.path.splitext(path)[0] + ".archive"
+
+def _account_slug(account: str) -> str:
+    return re.sub(r"[^\w.-]", "_", account) or "_"
+
+def shard_path(path: str, month: str, account: str) -> str:
+    return os.path.join(archive_dir_for(path), month, _account_slug(account) + ".jsonl.gz")
+
+def _entry_month(timestamp: Any) -> str:
+    month = str(timestamp)[:7]
+    return month if _MONTH.match(month) else UNDATED_MONTH
+
+def horizon_cutoff(horizon_months: int, now: Optional[datetime] = None) -> str:
+    # First day of the oldest month that still counts for dedupe; whole months are archived, so a
+    # shard never has to be reopened once its month is past the horizon.
+    now = now or datetime.now()
+    months = now.year * 12 + now.month - 1 - horizon_months
+    return f"{months // 12:04d}-{months % 12 + 1:02d}-01"
+
+def _read_shard(shard: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(shard):
+        return []
+    with gzip.open(shard, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def _write_shard(shard: str, entries: List[Dict[str, Any]]) -> None:
+    os.makedirs(os.path.dirname(shard), exist_ok=True)
+    tmp_path = locking.temp_path_for(shard)
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        locking.atomic_replace(tmp_path, shard)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def archive(path: str = LEDGER_PATH, horizon_months: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    # Moves entries older than the dedupe horizon out of the snapshot into gzip shards, one per month
+    # and account. Shards are merged by ticket and swapped in before the rows are deleted, so a crash
+    # in between only means the same rows are archived (idempotently) again next time.
+    if not horizon_months or horizon_months <= 0:
+        return 0
+    cutoff = horizon_cutoff(horizon_months, now)
+    with ledger_lock(path):
+        with closing(connect(path)) as conn:
+            rows = conn.execute("SELECT id, timestamp, account, ticket_id, user_name, analyst_name, message, status "
+                                "FROM feedback_log WHERE timestamp < ? ORDER BY id", (cutoff,)).fetchall()
+            if not rows:
+                return 0
+            shards: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+            for row in rows:
+                entry = dict(zip(_JOURNAL_FIELDS, row[1:]))
+                shards.setdefault((_entry_month(entry["timestamp"]), entry["account"]), []).append(entry)
+            for (month, account), entries in shards.items():
+                shard = shard_path(path, month, account)
+                merged = {(entry["account"], entry["ticket_id"]): entry for entry in _read_shard(shard)}
+                merged.update(((entry["account"], entry["ticket_id"]), entry) for entry in entries)
+                _write_shard(shard, list(merged.values()))
+            ids = [(row[0],) for row in rows]
+            with conn:
+                conn.executemany("DELETE FROM feedback_log WHERE id = ?", ids)
+                conn.execute("DELETE FROM ledger_meta WHERE key = 'exported_id'")
+        invalidate_key_index()
+        sync_keyfile(path, rebuild=True)
+    print(f"[i] Archived {len(rows)} log entries older than {cutoff} to {archive_dir_for(path)}.")
+    return len(rows)
+
+def list_shards(path: str = LEDGER_PATH, accounts: Optional[Iterable[str]] = None) -> List[Tuple[str, str]]:
+    # (month, shard path) pairs, oldest month first. Filtering by account only opens that account's files.
+    directory = archive_dir_for(path)
+    if not os.path.isdir(directory):
+        return []
+    names = None if accounts is None else {_account_slug(account) + ".jsonl.gz" for account in accounts}
+    found = []
+    for month in sorted(os.listdir(directory)):
+        month_dir = os.path.join(directory, month)
+        if not os.path.isdir(month_dir):
+            continue
+        for name in sorted(os.listdir(month_dir)):
+            if name.endswith(".jsonl.gz") and (names is None or name in names):
+                found.append((month, os.path.join(month_dir, name)))
+    return found
+
+def load_archived_entries(path: str = LEDGER_PATH, accounts: Optional[Iterable[str]] = None,
+                          since: Optional[str] = None, until: Optional[str] = None) -> pd.DataFrame:
+    # On-demand query over the archive; since/until are inclusive "YYYY-MM" months and, as in
+    # load_rollups, exclude the undated shard.
+    accounts = list(accounts) if accounts is not None else None
+    wanted = set(accounts) if accounts is not None else None
+    rows = []
+    for month, shard in list_shards(path, accounts):
+        if not _in_months(month, since, until):
+            continue
+        rows.extend(_entry_row(entry) for entry in _read_shard(shard)
+                    if wanted is None or entry["account"] in wanted)
+    return pd.DataFrame(rows, columns=LOG_COLUMNS)
+
+
+class LedgerCompactor:
+    # Folds the journal every interval_seconds on a background thread. The xlsx report is only
+    # refreshed here when export_xlsx is set; run_once() at startup and the final fold on stop()
+    # never rewrite it, since they run on the caller's (UI) thread.
+    def __init__(self, interval_seconds: float = 300, export_xlsx: bool = False, path: str = LEDGER_PATH,
+                 horizon_months: Optional[int] = None):
+        self.interval_seconds = interval_seconds
+        self.export_xlsx = export_xlsx
+        self.path = path
+        self.horizon_months = horizon_months
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ledger-compactor", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.run_once(export_xlsx=self.export_xlsx)
+
+    def run_once(self, export_xlsx: bool = False) -> int:
+        try:
+            return compact(self.path, export_xlsx=export_xlsx, horizon_months=self.horizon_months)
+        except Exception as e:
+            print(f"[!] Ledger compaction failed: {e}")
+            return 0
+
+    def stop(self, final_compaction: bool = True) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if final_compaction:
+            self.run_once()
+
+
+class WriteBehindBuffer:
+    # Collects entries in memory and appends them to the journal in batches from a background thread,
+    # on a timer or once max_pending entries are waiting. Buffered keys count as logged for dedupe
+    # right away. A failed flush keeps the entries for the next attempt; if the final flush on stop
+    # fails too, they are spilled to a file that the next start replays. take_error() reports a
+    # failure once, and again only if the error changes or a flush succeeds in between.
+    def __init__(self, status: str = "Rejected", flush_interval: float = 2.0, max_pending: int = 25,
+                 path: str = LEDGER_PATH):
+        self.status = status
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.path = path
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._error: Optional[Exception] = None
+        self._last_error: Optional[Exception] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def spill_path(self) -> str:
+        return f"{os.path.splitext(self.path)[0]}.pending.{self.status.lower()}.jsonl"
+
+    def start(self) -> None:
+        spilled = self._read_spill()
+        if spilled:
+            self.add(spilled)
+            if self.flush():
+                os.remove(self.spill_path)
+                print(f"[i] Logged {len(spilled)} buffered {self.status.lower()} entries left over from the last run.")
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ledger-write-behind", daemon=True)
+            self._thread.start()
+
+    def add(self, feedbacks: Iterable[Dict[str, Any]]) -> None:
+        feedbacks = list(feedbacks)
+        _hold_pending((str(fb["account"]), normalize_ticket_id(fb["ticket_id"])) for fb in feedbacks)
+        with self._lock:
+            self._pending.extend(feedbacks)
+            if len(self._pending) >= self.max_pending:
+                self._wake.set()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def last_error(self) -> Optional[Exception]:
+        # The error of the current failing streak, whether or not take_error() already returned it.
+        with self._lock:
+            return self._last_error
+
+    def take_error(self) -> Optional[Exception]:
+        with self._lock:
+            error, self._error = self._error, None
+            return error
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.flush()
+
+    def flush(self) -> bool:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return True
+            try:
+                append_entries(batch, status=self.status, path=self.path)
+            except Exception as e:
+                with self._lock:
+                    self._pending[:0] = batch
+                    last = self._last_error
+                    if last is None or (type(last), str(last)) != (type(e), str(e)):
+                        self._error = e
+                    self._last_error = e
+                return False
+            with self._lock:
+                self._last_error = None
+            _release_pending((str(fb["account"]), normalize_ticket_id(fb["ticket_id"])) for fb in batch)
+            return True
+
+    def _read_spill(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.spill_path):
+            return []
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _spill(self) -> None:
+        with self._lock:
+            batch = list(self._pending)
+        if not batch:
+            return
+        # Anything replayed from an older spill is back in the buffer, so the file is rewritten whole.
+        tmp_path = locking.temp_path_for(self.spill_path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(fb, ensure_ascii=False, default=str) + "\n" for fb in batch)
+            f.flush()
+            os.fsync(f.fileno())
+        locking.atomic_replace(tmp_path, self.spill_path)
+
+    def stop(self) -> bool:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.flush():
+            return True
+        self._spill()
+        return False
+
+def write_behind_from_config(config: Dict[str, Any], status: str = "Rejected",
+                             path: str = LEDGER_PATH) -> WriteBehindBuffer:
+    settings = config.get("write_behind") or {}
+    return WriteBehindBuffer(status, settings.get("flush_seconds", 2.0), settings.get("max_pending", 25), path)
+
+def compactor_from_config(config: Dict[str, Any], path: str = LEDGER_PATH) -> LedgerCompactor:
+    settings = config.get("ledger_compaction") or {}
+    return LedgerCompactor(settings.get("interval_seconds", 300), settings.get("export_xlsx", False), path,
+                           config.get("dedupe_horizon_months"))
@@ -0,0 +1,77 @@
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Tuple, Type
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+LOCK_TIMEOUT = 30.0
+RETRY_ATTEMPTS = 6
+RETRY_DELAY = 0.05
+RETRY_MAX_DELAY = 2.0
+
+
+def _backoff(attempt: int, base_delay: float = RETRY_DELAY, max_delay: float = RETRY_MAX_DELAY) -> float:
+    # Exponential backoff with full jitter, so writers that collided do not retry in lockstep.
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if os.name == "nt":
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+def _unlock(fd: int) -> None:
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+@contextmanager
+def file_lock(lock_path: str, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+    # Advisory exclusive lock shared by every process that opens the same lock file. The lock is
+    # released by the OS if the holder dies, so a crashed writer never blocks the others.
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out after {timeout:.0f}s waiting for {lock_path}")
+            time.sleep(_backoff(attempt, max_delay=0.25))
+            attempt += 1
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+def retry(func: Callable[..., Any], *args: Any, attempts: int = RETRY_ATTEMPTS,
+          exceptions: Tuple[Type[BaseException], ...] = (OSError,), **kwargs: Any) -> Any:
+    # For transient failures on shared folders: a replace blocked by a reader on Windows, a
+    # network share hiccup, or SQLite reporting the database as locked.
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except exceptions:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(_backoff(attempt))
+
+def atomic_replace(tmp_path: str, target_path: str) -> None:
+    retry(os.replace, tmp_path, target_path)
+
+def temp_path_for(target_path: str, suffix: str = ".tmp") -> str:
+    # Unique per process and call, so concurrent writers never share a temp file.
+    return f"{target_path}.{os.getpid()}.{time.monotonic_ns()}{suffix}"
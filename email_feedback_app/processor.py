@@ -1,90 +1,322 @@
-import openpyxl
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from openpyxl.utils import column_index_from_string
+from email_feedback_app import funnel, instrumentation
+from email_feedback_app.cache import build_cache_key, load_cached_entry, store_cached_entry, evict_missing_entries
+from email_feedback_app.readers import get_reader, strip_supported_extension
+
+MIN_POSITIVE_RATING = 4.0
+FEEDBACK_FIELDS = ("ticket_id", "message", "analyst_name", "user_name")
+
+_plan_cache = {}
 
 
 def column_letter_to_index(letter):
     return column_index_from_string(letter)
 
-def get_cell_value(sheet, row, column):
-    return sheet.cell(row=row, column=column).value
+def get_row_value(row, column):
+    index = column - 1
+    return row[index] if index < len(row) else None
 
-def process_feedbacks(filepath, config):
+def config_fingerprint(account_config):
+    return json.dumps(account_config, sort_keys=True, default=str)
+
+def _compile_predicate(account_config):
+    checks = []
+
+    if 'assignment_group' in account_config:
+        group_col = column_letter_to_index(account_config['assignment_group']['column'])
+        required = account_config['assignment_group']['required_value']
+        if isinstance(required, list):
+            checks.append((group_col, "in", frozenset(required), "assignment_group"))
+        else:
+            checks.append((group_col, "eq", required, "assignment_group"))
+
+    if 'rating_text' in account_config:
+        rating_col = column_letter_to_index(account_config['rating_text']['column'])
+        checks.append((rating_col, "eq", account_config['rating_text']['positive_value'], "rating"))
+    elif 'rating_inverted' in account_config:
+        rating_col = column_letter_to_index(account_config['rating_inverted']['column'])
+        checks.append((rating_col, "in", frozenset(account_config['rating_inverted']['valid_values']), "rating"))
+    else:
+        rating_col = column_letter_to_index(account_config['rating'])
+        checks.append((rating_col, "min", MIN_POSITIVE_RATING, "rating"))
+
+    # Returns the name of the first rule that rejects the row, or None when the row passes.
+    def predicate(row):
+        row_len = len(row)
+        for column, kind, expected, rule in checks:
+            value = row[column - 1] if column <= row_len else None
+            if kind == "eq":
+                if value != expected:
+                    return rule
+            elif kind == "in":
+                try:
+                    if value not in expected:
+                        return rule
+                except TypeError:
+                    return rule
+            else:
+                try:
+                    if float(value) < expected:
+                        return rule
+                except (ValueError, TypeError):
+                    return rule
+        return None
+
+    return predicate
+
+def _compile_extractor(account_config):
+    ticket_col = column_letter_to_index(account_config["ticket_id"])
+    message_col = column_letter_to_index(account_config["message"])
+    analyst_col = column_letter_to_index(account_config["analyst_name"])
+
+    if "user_name_parts" in account_config:
+        user_cols = [column_letter_to_index(col) for col in account_config["user_name_parts"]]
+        user_mode = "parts"
+    elif "user_name" in account_config:
+        user_cols = [column_letter_to_index(account_config["user_name"])]
+        user_mode = "single"
+    else:
+        user_cols = []
+        user_mode = None
+
+    def extractor(row):
+        values = {
+            "ticket_id": get_row_value(row, ticket_col),
+            "message": get_row_value(row, message_col),
+            "analyst_name": get_row_value(row, analyst_col),
+        }
+        if user_mode == "parts":
+            values["user_name"] = " ".join(filter(None, [get_row_value(row, col) for col in user_cols]))
+        elif user_mode == "single":
+            values["user_name"] = get_row_value(row, user_cols[0])
+        else:
+            values["user_name"] = None
+        return values
+
+    return extractor
+
+def _mapped_columns(account_config):
+    letters = [account_config["ticket_id"], account_config["message"], account_config["analyst_name"]]
+    letters += account_config.get("user_name_parts", [])
+    if "user_name" in account_config:
+        letters.append(account_config["user_name"])
+    for rule in ("assignment_group", "rating_text", "rating_inverted"):
+        if rule in account_config:
+            letters.append(account_config[rule]["column"])
+    if "rating" in account_config:
+        letters.append(account_config["rating"])
+    return sorted({column_letter_to_index(letter) for letter in letters})
+
+def compile_account_plan(account_config):
+    fingerprint = config_fingerprint(account_config)
+    plan = _plan_cache.get(fingerprint)
+    if plan is None:
+        plan = {
+            "sheet_name": account_config.get("sheet_name", "Sheet1"),
+            "header_row": account_config.get("header_row", 1),
+            "predicate": _compile_predicate(account_config),
+            "extract": _compile_extractor(account_config),
+            "columns": _mapped_columns(account_config),
+        }
+        _plan_cache[fingerprint] = plan
+    return plan
+
+def _open_feedback_source(filepath, config):
     account_name = get_account_name_from_filename(filepath)
     account_config = config['accounts'].get(account_name)
 
     if not account_config:
         print(f"No config found for account: {account_name}")
-        return
+        return None
 
-    sheet_name = account_config.get("sheet_name", "Sheet1")
-    header_row = account_config.get("header_row", 1)
+    reader = get_reader(filepath)
+    if reader is None:
+        print(f"[ERROR] Unsupported file format: {filepath}")
+        return None
 
-    wb = openpyxl.load_workbook(filepath, data_only=True)
+    plan = compile_account_plan(account_config)
+    with instrumentation.span("ingest.open", account_name) as span:
+        if instrumentation.is_enabled():
+            span.add(bytes_read=os.path.getsize(filepath))
+        source = reader(filepath, plan)
+    if source is None:
+        return None
+    rows, close = source
+    return rows, close, plan, account_name
 
-    if sheet_name not in wb.sheetnames:
-        print(f"[ERROR] The sheet '{sheet_name}' was not found in the file {filepath}.")
+def _iter_source_feedbacks(rows, close, plan, account_name, skip=0, limit=None, stats=None):
+    scanned = 0
+    yielded = 0
+    rejected = stats["rejected"] if stats is not None else funnel.new_ingest_stats()["rejected"]
+    try:
+        with instrumentation.span("ingest.rows", account_name) as span:
+            try:
+                if limit is not None and limit <= 0:
+                    return
+                predicate = plan["predicate"]
+                extract = plan["extract"]
+                for row in rows:
+                    scanned += 1
+                    rule = predicate(row)
+                    if rule is not None:
+                        rejected[rule] += 1
+                        continue
+                    if skip > 0:
+                        skip -= 1
+                        continue
+                    yield extract(row)
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+            finally:
+                span.add(rows_scanned=scanned, rows_kept=yielded)
+                if stats is not None:
+                    stats["rows_read"] = scanned
+    finally:
+        close()
+
+def iter_feedbacks(filepath, config, skip=0, limit=None):
+    # A generator itself, so the file is only opened on the first next() and a generator that is
+    # dropped before that never leaves an open workbook or CSV handle behind.
+    source = _open_feedback_source(filepath, config)
+    if source is None:
         return
+    yield from _iter_source_feedbacks(*source, skip=skip, limit=limit)
+
+def _collect_feedbacks(filepath, config):
+    source = _open_feedback_source(filepath, config)
+    if source is None:
+        return None, None
+    stats = funnel.new_ingest_stats()
+    return list(_iter_source_feedbacks(*source, stats=stats)), stats
 
-    sheet = wb[sheet_name]
+def process_feedbacks(filepath, config):
+    feedbacks, stats = _collect_feedbacks(filepath, config)
+    if feedbacks is not None:
+        funnel.record_ingest(get_account_name_from_filename(filepath), stats)
+    return feedbacks
 
-    headers = {cell.value: col_idx for col_idx, cell in enumerate(sheet[header_row], start=1)}
+def get_account_name_from_filename(filename):
+    base = os.path.basename(filename)
+    name = strip_supported_extension(base)
+    if name is None:
+        name, _ = os.path.splitext(base)
+    return name
 
-    feedbacks = []
+def _process_file_compact(filepath, config, trace=False):
+    # Runs in a worker process: ship plain tuples back instead of dicts to keep pickling cheap.
+    # With trace set, spans recorded in the worker are returned so the parent can keep them.
+    if trace:
+        instrumentation.drain()
+        instrumentation.enable()
+    result = {"account": get_account_name_from_filename(filepath), "rows": None, "stats": None, "error": None}
+    try:
+        feedbacks, stats = _collect_feedbacks(filepath, config)
+        if feedbacks is not None:
+            result["rows"] = [tuple(fb[field] for field in FEEDBACK_FIELDS) for fb in feedbacks]
+            result["stats"] = stats
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["spans"] = instrumentation.drain() if trace else []
+    return result
 
-    for row in sheet.iter_rows(min_row=header_row + 1):
-        values = {}
-        row_num = row[0].row 
+def list_feedback_files(data_dir):
+    return [os.path.join(data_dir, file) for file in sorted(os.listdir(data_dir)) if get_reader(file) is not None]
 
-        if 'assignment_group' in account_config:
-            group_col = column_letter_to_index(account_config['assignment_group']['column'])
-            group_val = get_cell_value(sheet, row_num, group_col)
-            required = account_config['assignment_group']['required_value']
-            if isinstance(required, list):
-                if group_val not in required:
-                    continue
-            else:
-                if group_val != required:
-                    continue
+def resolve_worker_count(config, file_count):
+    workers = config.get("ingest_workers") or os.cpu_count() or 1
+    return max(1, min(int(workers), file_count))
 
-        if 'rating_text' in account_config:
-            rating_col = column_letter_to_index(account_config['rating_text']['column'])
-            rating_val = get_cell_value(sheet, row_num, rating_col)
-            if rating_val != account_config['rating_text']['positive_value']:
-                continue
+def _parse_files(files, config, workers):
+    if workers == 1:
+        return [_process_file_compact(filepath, config) for filepath in files]
+    trace = [instrumentation.is_enabled()] * len(files)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_process_file_compact, files, [config] * len(files), trace))
+    except Exception as e:
+        print(f"[!] Parallel ingest failed ({e}), falling back to sequential loading.")
+        return [_process_file_compact(filepath, config) for filepath in files]
 
-        elif 'rating_inverted' in account_config:
-            rating_col = column_letter_to_index(account_config['rating_inverted']['column'])
-            rating_val = get_cell_value(sheet, row_num, rating_col)
-            if rating_val not in account_config['rating_inverted']['valid_values']:
-                continue
+def load_feedbacks_from_dir(data_dir, config, workers=None):
+    with instrumentation.span("ingest.dir") as span:
+        all_data = _load_feedbacks_from_dir(data_dir, config, workers, span)
+    return all_data
 
-        else:
-            rating_col = column_letter_to_index(account_config['rating'])
-            rating_val = get_cell_value(sheet, row_num, rating_col)
-            try:
-                if float(rating_val) < 4:
-                    continue
-            except (ValueError, TypeError):
-                continue
+def _load_feedbacks_from_dir(data_dir, config, workers, span):
+    files = list_feedback_files(data_dir)
+    use_cache = config.get("feedback_cache", True)
+    if use_cache:
+        evict_missing_entries()
+    if not files:
+        return {}
 
-        values["ticket_id"] = get_cell_value(sheet, row_num, column_letter_to_index(account_config["ticket_id"]))
-        values["message"] = get_cell_value(sheet, row_num, column_letter_to_index(account_config["message"]))
-        values["analyst_name"] = get_cell_value(sheet, row_num, column_letter_to_index(account_config["analyst_name"]))
+    results = {}
+    cache_keys = {}
+    to_parse = []
+    for filepath in files:
+        if use_cache:
+            account_config = config['accounts'].get(get_account_name_from_filename(filepath))
+            key = build_cache_key(filepath, config_fingerprint(account_config),
+                                  use_content_hash=config.get("feedback_cache_content_hash", False))
+            entry = load_cached_entry(filepath, key)
+            if entry is not None:
+                results[filepath] = {"account": get_account_name_from_filename(filepath), "rows": entry["rows"],
+                                     "stats": entry.get("stats"), "error": None, "spans": []}
+                continue
+            cache_keys[filepath] = key
+        to_parse.append(filepath)
 
-        if "user_name_parts" in account_config:
-            parts = [get_cell_value(sheet, row_num, column_letter_to_index(col)) for col in account_config["user_name_parts"]]
-            values["user_name"] = " ".join(filter(None, parts))
-        elif "user_name" in account_config:
-            values["user_name"] = get_cell_value(sheet, row_num, column_letter_to_index(account_config["user_name"]))
-        else:
-            values["user_name"] = None
+    span.add(files=len(files), cache_hits=len(files) - len(to_parse), parsed=len(to_parse))
+    if to_parse:
+        workers = resolve_worker_count(config, len(to_parse)) if workers is None else max(1, min(workers, len(to_parse)))
+        for filepath, result in zip(to_parse, _parse_files(to_parse, config, workers)):
+            results[filepath] = result
+            instrumentation.record_many(result["spans"])
+            if use_cache and result["rows"] is not None and not result["error"]:
+                store_cached_entry(filepath, cache_keys[filepath], result["rows"], result["stats"])
 
-        feedbacks.append(values)
+    # Files that map to the same account (e.g. Acc.xlsx and Acc.csv while a team switches export
+    # formats) are merged in sorted order; a ticket already read from an earlier file is skipped.
+    by_account = {}
+    for filepath in files:
+        by_account.setdefault(results[filepath]["account"], []).append(filepath)
 
-    return feedbacks
+    all_data = {}
+    for account_name, account_files in by_account.items():
+        if len(account_files) > 1:
+            names = ", ".join(os.path.basename(filepath) for filepath in account_files)
+            print(f"[!] Merging {len(account_files)} files for account {account_name}: {names}")
+        feedbacks = []
+        seen = set()
+        stats = None
+        for filepath in account_files:
+            result = results[filepath]
+            if result["error"]:
+                print(f"[ERROR] Failed to load feedbacks for {account_name} ({os.path.basename(filepath)}): "
+                      f"{result['error']}")
+            if result["stats"]:
+                stats = _merge_ingest_stats(stats, result["stats"])
+            for row in result["rows"] or ():
+                feedback = dict(zip(FEEDBACK_FIELDS, row))
+                if feedback["ticket_id"] in seen:
+                    continue
+                seen.add(feedback["ticket_id"])
+                feedbacks.append(feedback)
+        funnel.record_ingest(account_name, stats)
+        if feedbacks:
+            all_data[account_name] = feedbacks
+        else:
+            print(f"[!] No feedback loaded for: {account_name}")
+    return all_data
 
-def get_account_name_from_filename(filename):
-    base = os.path.basename(filename)
-    name, _ = os.path.splitext(base)
-    return name
+def _merge_ingest_stats(total, stats):
+    if total is None:
+        total = funnel.new_ingest_stats()
+    total["rows_read"] += stats["rows_read"]
+    for rule, count in stats["rejected"].items():
+        total["rejected"][rule] = total["rejected"].get(rule, 0) + count
+    return total
@@ -0,0 +1,89 @@
+import csv
+import gzip
+import io
+import re
+import openpyxl
+
+_INT_PATTERN = re.compile(r"-?(0|[1-9]\d*)")
+_FLOAT_PATTERN = re.compile(r"-?\d+\.\d+")
+
+READERS = {}
+
+
+def register_reader(extension, reader):
+    READERS[extension.lower()] = reader
+
+def get_reader(filepath):
+    name = filepath.lower()
+    # Longest suffix first so ".csv.gz" wins over ".gz".
+    for extension in sorted(READERS, key=len, reverse=True):
+        if name.endswith(extension):
+            return READERS[extension]
+    return None
+
+def supported_extensions():
+    return tuple(READERS)
+
+def strip_supported_extension(filename):
+    name = filename.lower()
+    for extension in sorted(READERS, key=len, reverse=True):
+        if name.endswith(extension):
+            return filename[:-len(extension)]
+    return None
+
+def coerce_text_value(value):
+    # Give text cells the types openpyxl would have produced so config filters behave the same.
+    if value == "":
+        return None
+    if _INT_PATTERN.fullmatch(value):
+        return int(value)
+    if _FLOAT_PATTERN.fullmatch(value):
+        return float(value)
+    return value
+
+def read_xlsx_rows(filepath, plan):
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+
+    sheet_name = plan["sheet_name"]
+    if sheet_name not in wb.sheetnames:
+        print(f"[ERROR] The sheet '{sheet_name}' was not found in the file {filepath}.")
+        wb.close()
+        return None
+
+    sheet = wb[sheet_name]
+    # Exports often carry a stale <dimension> tag; without this read-only mode would truncate rows.
+    sheet.reset_dimensions()
+    return sheet.iter_rows(min_row=plan["header_row"] + 1, values_only=True), wb.close
+
+def _read_delimited_rows(stream, plan, delimiter):
+    columns = [column - 1 for column in plan["columns"]]
+    reader = csv.reader(stream, delimiter=delimiter)
+
+    def rows():
+        for line_num, row in enumerate(reader, start=1):
+            if line_num <= plan["header_row"]:
+                continue
+            for index in columns:
+                if index < len(row):
+                    row[index] = coerce_text_value(row[index])
+            yield row
+
+    return rows(), stream.close
+
+def _open_text(filepath):
+    return open(filepath, "r", encoding="utf-8-sig", newline="")
+
+def read_csv_rows(filepath, plan):
+    return _read_delimited_rows(_open_text(filepath), plan, ",")
+
+def read_tsv_rows(filepath, plan):
+    return _read_delimited_rows(_open_text(filepath), plan, "\t")
+
+def read_csv_gz_rows(filepath, plan):
+    stream = io.TextIOWrapper(gzip.open(filepath, "rb"), encoding="utf-8-sig", newline="")
+    return _read_delimited_rows(stream, plan, ",")
+
+register_reader(".xlsx", read_xlsx_rows)
+register_reader(".csv", read_csv_rows)
+register_reader(".tsv", read_tsv_rows)
+register_reader(".csv.gz", read_csv_gz_rows)
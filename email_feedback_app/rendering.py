@@ -0,0 +1,158 @@
+import html
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from string import Template
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from email_feedback_app import instrumentation
+from email_feedback_app.assets import load_inline_assets
+
+CONFIG_PATH = os.path.join("config", "config.json")
+TEMPLATE_DIR = "templates"
+DEFAULT_LANGUAGE = "portuguese"
+TEMPLATE_FILES = {
+    "english": "email_template_en.html",
+    "spanish": "email_template_es.html",
+    "portuguese": "email_template.html",
+}
+SUBJECTS = {
+    "english": "[{account}] Recognition of Excellent Service",
+    "spanish": "[{account}] Reconocimiento de Servicio Excelente",
+    "portuguese": "[{account}] Reconhecimento de Excelente Atendimento",
+}
+RENDER_CHUNK = 64
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def build_subject(account: str, template_language: str) -> str:
+    return SUBJECTS.get(template_language, SUBJECTS[DEFAULT_LANGUAGE]).format(account=account)
+
+def template_path(language: str, template_dir: str = TEMPLATE_DIR) -> str:
+    return os.path.join(template_dir, TEMPLATE_FILES.get(language, TEMPLATE_FILES[DEFAULT_LANGUAGE]))
+
+
+class TemplateRegistry:
+    # Compiled email templates keyed by language. The config and template files are only stat'ed per
+    # render and re-read when their mtime or size changes, so rendering is a single substitution.
+    # Images are referenced as cid: URLs; the delivery side attaches the shared encoded parts.
+    def __init__(self, config_path: str = CONFIG_PATH, template_dir: str = TEMPLATE_DIR):
+        self.config_path = config_path
+        self.template_dir = template_dir
+        self._lock = threading.Lock()
+        self._language: Optional[Tuple[Tuple[int, int], str]] = None
+        self._templates: Dict[str, Tuple[Tuple[int, int], Template]] = {}
+
+    def language(self) -> str:
+        stamp = _file_stamp(self.config_path)
+        cached = self._language
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with self._lock:
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                language = json.load(f).get("template_language", DEFAULT_LANGUAGE)
+            self._language = (stamp, language)
+        return language
+
+    def get(self, language: str) -> Template:
+        path = template_path(language, self.template_dir)
+        stamp = _file_stamp(path)
+        cached = self._templates.get(language)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with self._lock:
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+            compiled = Template(source)
+            self._templates[language] = (stamp, compiled)
+        return compiled
+
+    def render(self, feedback: Dict[str, Any]) -> Tuple[str, str]:
+        language = self.language()
+        sources = {name: asset.src for name, asset in load_inline_assets(self.template_dir).items()}
+        filled_html = self.get(language).safe_substitute(
+            sources,
+            analyst_name=feedback.get("analyst_name", ""),
+            user_name=feedback.get("user_name", ""),
+            message=html.escape(str(feedback.get("message", ""))),
+            ticket_id=feedback.get("ticket_id", ""),
+        )
+        return filled_html, language
+
+    def clear(self) -> None:
+        with self._lock:
+            self._language = None
+            self._templates.clear()
+
+
+_registry = TemplateRegistry()
+
+def get_registry() -> TemplateRegistry:
+    return _registry
+
+def render(feedback: Dict[str, Any]) -> Tuple[str, str]:
+    return _registry.render(feedback)
+
+def _render_one(index: int, feedback: Dict[str, Any]) -> Dict[str, Any]:
+    result = {"index": index, "feedback": feedback, "html": None, "subject": None, "language": None, "error": None}
+    try:
+        result["html"], result["language"] = _registry.render(feedback)
+        result["subject"] = build_subject(feedback.get("account", ""), result["language"])
+    except Exception as e:
+        result["error"] = f"Failed to render email template: {e}"
+    return result
+
+def _chunk_account(feedbacks: List[Dict[str, Any]]) -> Optional[str]:
+    # Label for the chunk's span. Never raises: a malformed feedback must only fail its own item.
+    accounts = {str(feedback.get("account")) if isinstance(feedback, dict) else None for feedback in feedbacks}
+    return accounts.pop() if len(accounts) == 1 else None
+
+def _render_chunk(start: int, feedbacks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # One "render" span per chunk. Spans recorded inside a process pool stay in the worker process,
+    # so only the thread pool (the default) and in-process rendering show up in a trace.
+    with instrumentation.span("render", _chunk_account(feedbacks), rows_kept=len(feedbacks)):
+        return [_render_one(start + offset, feedback) for offset, feedback in enumerate(feedbacks)]
+
+def resolve_render_workers(config: Dict[str, Any]) -> int:
+    return max(1, int(config.get("render_workers") or os.cpu_count() or 1))
+
+def _chunks(feedbacks: Iterable[Dict[str, Any]], size: int) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    iterator = iter(feedbacks)
+    start = 0
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+def render_many(feedbacks: Iterable[Dict[str, Any]], workers: int = 1, pool: str = "thread",
+                chunk_size: int = RENDER_CHUNK) -> Iterator[Dict[str, Any]]:
+    # Renders bodies and subjects on a pool and yields one result dict per feedback, in input order,
+    # as soon as its chunk is done, so delivery can start while later chunks are still rendering.
+    # A failed item carries "error" instead of "html"; it never aborts the batch. Only a bounded
+    # number of chunks is in flight, so the input can be a lazy iterator.
+    chunks = _chunks(feedbacks, chunk_size)
+    if workers <= 1:
+        for start, chunk in chunks:
+            yield from _render_chunk(start, chunk)
+        return
+
+    executor: Executor = (ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor)(max_workers=workers)
+    try:
+        in_flight = deque()
+        for start, chunk in islice(chunks, workers * 2):
+            in_flight.append(executor.submit(_render_chunk, start, chunk))
+        while in_flight:
+            results = in_flight.popleft().result()
+            for start, chunk in islice(chunks, 1):
+                in_flight.append(executor.submit(_render_chunk, start, chunk))
+            yield from results
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,73 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from email_feedback_app.utils import load_kudos_stats
+
+GROUPINGS = {
+    "Analyst": ["Account", "AnalystName"],
+    "Group": ["Account", "Group"],
+    "Month": ["Month"],
+    "Analyst per month": ["Month", "Account", "AnalystName"],
+}
+STATUSES = {"Approved": "Approved", "Rejected": "Rejected", "All": None}
+
+class StatsWindow(tk.Toplevel):
+    def __init__(self, master, accounts, analysts_config, account=None):
+        super().__init__(master)
+        self.title("Recognition Stats")
+        self.geometry("700x500")
+        self.analysts_config = analysts_config
+
+        self.account = tk.StringVar(value=account or "All accounts")
+        self.grouping = tk.StringVar(value="Analyst")
+        self.status = tk.StringVar(value="Approved")
+        self.since = tk.StringVar()
+        self.until = tk.StringVar()
+
+        filters = ttk.Frame(self)
+        filters.pack(fill="x", padx=10, pady=10)
+        ttk.Label(filters, text="Account:").pack(side="left")
+        ttk.Combobox(filters, textvariable=self.account, values=["All accounts"] + list(accounts),
+                     state="readonly", width=18).pack(side="left", padx=5)
+        ttk.Label(filters, text="By:").pack(side="left")
+        ttk.Combobox(filters, textvariable=self.grouping, values=list(GROUPINGS),
+                     state="readonly", width=16).pack(side="left", padx=5)
+        ttk.Label(filters, text="Status:").pack(side="left")
+        ttk.Combobox(filters, textvariable=self.status, values=list(STATUSES),
+                     state="readonly", width=9).pack(side="left", padx=5)
+        ttk.Label(filters, text="From/To (YYYY-MM):").pack(side="left")
+        ttk.Entry(filters, textvariable=self.since, width=8).pack(side="left", padx=2)
+        ttk.Entry(filters, textvariable=self.until, width=8).pack(side="left", padx=2)
+        ttk.Button(filters, text="Show", command=self.refresh).pack(side="left", padx=5)
+
+        self.tree = ttk.Treeview(self, show="headings")
+        self.tree.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.total_label = ttk.Label(self, text="")
+        self.total_label.pack(pady=(0, 10))
+
+        self.refresh()
+
+    def refresh(self):
+        account = self.account.get()
+        columns = GROUPINGS[self.grouping.get()]
+        try:
+            stats = load_kudos_stats(
+                by=columns,
+                accounts=None if account == "All accounts" else [account],
+                since=self.since.get().strip() or None,
+                until=self.until.get().strip() or None,
+                status=STATUSES[self.status.get()],
+                analysts_config=self.analysts_config,
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load stats: {e}", parent=self)
+            return
+
+        self.tree.delete(*self.tree.get_children())
+        self.tree.config(columns=columns + ["Count"])
+        for col in columns + ["Count"]:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=80 if col in ("Count", "Month") else 200, anchor="center")
+        for row in stats.itertuples(index=False):
+            self.tree.insert("", "end", values=tuple(row))
+        self.total_label.config(text=f"Total: {int(stats['Count'].sum()) if not stats.empty else 0}")
@@ -1,18 +1,24 @@
 import json
+import queue
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from email_feedback_app.settings_window import SettingsWindow
-import os
+from email_feedback_app.stats_window import StatsWindow
 from datetime import datetime
 from email_feedback_app.utils import (
     load_analysts_config,
     filter_and_process_feedbacks,
     get_email_config,
-    save_to_log,    
-    generate_outlook_emails,
-    load_config
+    lookup_analyst,
+    load_config,
+    set_error_handler,
+    export_log
 )
-from email_feedback_app.processor import process_feedbacks
+from email_feedback_app.processor import load_feedbacks_from_dir
+from email_feedback_app.funnel import format_funnel, write_funnel_report
+from email_feedback_app import ledger
+from email_feedback_app.delivery import backend_from_config
+from email_feedback_app.jobs import EmailJob
 
 class FeedbackApp:
     def __init__(self, root, config):
@@ -21,6 +27,15 @@ class FeedbackApp:
         self.selected_account = tk.StringVar()
         self.current_page = 1
         self.items_per_page = 20
+        self.email_job = None
+
+        set_error_handler(messagebox.showerror)
+
+        self.ledger_compactor = ledger.compactor_from_config(config)
+        self.ledger_compactor.run_once()
+        self.ledger_compactor.start()
+        self.rejections = ledger.write_behind_from_config(config, status="Rejected")
+        self.rejections.start()
 
         self.raw_feedbacks = self.load_all_feedbacks()
         self.all_feedbacks = filter_and_process_feedbacks(self.raw_feedbacks)
@@ -29,6 +44,7 @@ class FeedbackApp:
 
         self.setup_ui()
         self.setup_styles()
+        self.root.after(1000, self.check_rejections)
 
     def setup_styles(self):
         self.style = ttk.Style()
@@ -40,17 +56,7 @@ class FeedbackApp:
                        background=[('pressed', '#00C47D'), ('active', '#00E28B')])
 
     def load_all_feedbacks(self):
-        all_data = {}
-        for file in os.listdir("data"):
-            if file.endswith(".xlsx"):
-                filepath = os.path.join("data", file)
-                account_name = os.path.splitext(file)[0]
-                feedbacks = process_feedbacks(filepath, self.config)
-                if feedbacks:
-                    all_data[account_name] = feedbacks
-                else:
-                    print(f"[!] No feedback loaded for: {account_name}")
-        return all_data
+        return load_feedbacks_from_dir("data", self.config)
 
     def setup_ui(self):
         self.root.title("Kudos Manager")
@@ -65,17 +71,53 @@ class FeedbackApp:
         self.account_dropdown.pack(side="left", padx=5)
 
         ttk.Button(top_frame, text="Refresh Data", command=self.refresh_data).pack(side="left", padx=5)
+        ttk.Button(top_frame, text="Export Log", command=self.export_log).pack(side="left", padx=5)
+        ttk.Button(top_frame, text="Stats", command=self.open_stats).pack(side="left", padx=5)
 
         self.setup_table()
         self.setup_pagination()
 
+        self.funnel_label = ttk.Label(self.root, text="")
+        self.funnel_label.pack(pady=(0, 5))
+
         self.generate_btn = ttk.Button(self.root, text="Generate Emails", command=self.generate_emails, state="disabled")
         self.generate_btn.pack(pady=10)
 
+        self.job_frame = ttk.Frame(self.root)
+        self.job_label = ttk.Label(self.job_frame, text="")
+        self.job_label.pack(side="left", padx=5)
+        self.job_progress = ttk.Progressbar(self.job_frame, length=300, mode="determinate")
+        self.job_progress.pack(side="left", padx=5)
+        self.pause_btn = ttk.Button(self.job_frame, text="Pause", command=self.toggle_email_job_pause)
+        self.pause_btn.pack(side="left", padx=5)
+        ttk.Button(self.job_frame, text="Cancel", command=self.cancel_email_job).pack(side="left", padx=5)
+
         settings_btn = ttk.Button(top_frame, text="⚙️ Settings", command=self.open_settings)
         settings_btn.pack(side=tk.RIGHT, padx=10)
 
         self.account_dropdown.bind("<<ComboboxSelected>>", lambda event: self.load_feedbacks())
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        self.root.config(cursor="wait")
+        self.root.update()
+        try:
+            if self.email_job_running():
+                self.email_job.cancel()
+                self.email_job.join()
+            if not self.rejections.stop():
+                messagebox.showerror("Error", f"Failed to save rejected feedbacks: {self.rejections.last_error}\n"
+                                              f"They were kept in {self.rejections.spill_path} and will be logged on the next start.")
+            self.ledger_compactor.stop()
+        finally:
+            self.root.destroy()
+
+    def check_rejections(self):
+        error = self.rejections.take_error()
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to save {self.rejections.pending_count()} rejected feedbacks "
+                                          f"(they are kept and retried): {error}")
+        self.root.after(1000, self.check_rejections)
 
     def refresh_data(self):
         self.root.config(cursor="wait")
@@ -96,6 +138,30 @@ class FeedbackApp:
         finally:
             self.root.config(cursor="")
 
+    def update_funnel_status(self):
+        account = self.selected_account.get()
+        self.funnel_label.config(text=format_funnel(account) if account else "")
+        try:
+            write_funnel_report()
+        except Exception as e:
+            print(f"Error writing funnel report: {e}")
+
+    def export_log(self):
+        self.root.config(cursor="wait")
+        self.root.update()
+        try:
+            self.rejections.flush()
+            self.ledger_compactor.run_once()
+            if export_log():
+                messagebox.showinfo("Success", "Log exported to logs/approved_feedbacks.xlsx")
+        finally:
+            self.root.config(cursor="")
+
+    def open_stats(self):
+        self.rejections.flush()
+        StatsWindow(self.root, list(self.config.get("accounts", {})), self.analysts_config,
+                    self.selected_account.get() or None)
+
     def open_settings(self):
         settings_window = SettingsWindow(
             master=self.root,
@@ -148,7 +214,8 @@ class FeedbackApp:
 
         self.current_page = 1
         self.display_feedbacks()
-        self.generate_btn.config(state="normal")
+        self.generate_btn.config(state="disabled" if self.email_job_running() else "normal")
+        self.update_funnel_status()
 
         loading_label.destroy()
         self.root.config(cursor="")
@@ -266,7 +333,8 @@ class FeedbackApp:
                 "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
 
-            save_to_log([rejected_feedback], status="Rejected")
+            # Buffered and logged in batches off the Tk thread; the row counts as logged immediately.
+            self.rejections.add([rejected_feedback])
             self.tree.delete(item) 
 
     def generate_emails(self):
@@ -290,28 +358,91 @@ class FeedbackApp:
             messagebox.showwarning("Warning", "No feedbacks to generate emails.")
             return
 
-        if not save_to_log(feedbacks_to_export):
+        if self.email_job_running():
+            return
+        try:
+            backend = backend_from_config(self.config, default="outlook")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to set up email delivery: {e}")
             return
 
-        success = generate_outlook_emails(
-            feedbacks_to_export,
-            self.analysts_config,
-            self.config.get("default_sender_email", "")
-        )
+        # Runs on a worker thread; only messages that were actually delivered get logged.
+        self.email_job = EmailJob(feedbacks_to_export, self.analysts_config,
+                                  self.config.get("default_sender_email", ""), backend, self.config)
+        self.job_failures = []
+        self.generate_btn.config(state="disabled")
+        self.job_progress.config(maximum=len(feedbacks_to_export), value=0)
+        self.job_label.config(text=f"Generating 0/{len(feedbacks_to_export)}...")
+        self.pause_btn.config(text="Pause")
+        self.job_frame.pack(pady=(0, 10), before=self.generate_btn)
+        self.email_job.start()
+        self.root.after(100, self.poll_email_job)
+
+    def poll_email_job(self):
+        job = self.email_job
+        while True:
+            try:
+                event = job.events.get_nowait()
+            except queue.Empty:
+                break
+            if event["event"] == "message":
+                if not event["ok"]:
+                    self.job_failures.append(f"{event['account']} / {event['ticket_id']}: {event['error']}")
+                self.job_progress.config(value=event["index"])
+                self.job_label.config(text=f"Generating {event['index']}/{event['total']} "
+                                           f"(sent {job.summary['sent']}, failed {job.summary['failed']})")
+            elif event["event"] == "paused":
+                self.pause_btn.config(text="Resume")
+                self.job_label.config(text=self.job_label.cget("text") + " - paused")
+            elif event["event"] == "resumed":
+                self.pause_btn.config(text="Pause")
+            elif event["event"] == "done":
+                self.finish_email_job(event)
+                return
+        self.root.after(100, self.poll_email_job)
 
-        if success:
-            self.load_feedbacks()
-            messagebox.showinfo("Success", f"Generated {len(feedbacks_to_export)} email drafts in Outlook!")
+    def toggle_email_job_pause(self):
+        if self.email_job is not None:
+            if self.email_job.paused:
+                self.email_job.resume()
+            else:
+                self.email_job.pause()
+
+    def cancel_email_job(self):
+        if self.email_job is not None:
+            self.email_job.cancel()
+            self.job_label.config(text="Cancelling...")
+
+    def email_job_running(self):
+        return self.email_job is not None and self.email_job.is_alive()
+
+    def finish_email_job(self, summary):
+        # "done" is the job's last event, but its thread may not have exited yet.
+        self.email_job = None
+        self.job_frame.pack_forget()
+        self.generate_btn.config(state="normal")
+        self.load_feedbacks()
+
+        backend = (self.config.get("delivery") or {}).get("backend", "outlook")
+        target = "email drafts in Outlook" if backend == "outlook" else f"emails ({backend})"
+        lines = [f"Generated {summary['sent']} of {summary['total']} {target}."]
+        if summary["cancelled"]:
+            lines.append("The job was cancelled.")
+        if summary["failed"]:
+            lines.append(f"{summary['failed']} failed:")
+            lines.extend(self.job_failures[:10])
+        if summary["error"]:
+            lines.append(f"Delivery stopped: {summary['error']}")
+        if summary["log_error"]:
+            lines.append(f"Failed to save to the feedback log: {summary['log_error']}")
+        if summary["failed"] or summary["error"] or summary["log_error"]:
+            messagebox.showerror("Error", "\n".join(lines))
         else:
-            messagebox.showerror("Error", "Failed to generate emails. Check the logs for details.")
-    
+            messagebox.showinfo("Success", "\n".join(lines))
+
     def get_analyst_email(self, account, analyst_name):
-        account_config = self.analysts_config.get(account, {})
-        groups = account_config.get("groups", {})
-        for group in groups.values():
-            if analyst_name in group.get("analysts", {}):
-                return group["analysts"][analyst_name]
-        return None
+        entry = lookup_analyst(account, analyst_name, self.analysts_config)
+        return entry[0] if entry is not None else None
 
     def prev_page(self):
         if self.current_page > 1:
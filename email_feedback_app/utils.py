@@ -1,159 +1,231 @@
 import json
 import os
+import sys
 import pandas as pd
-from datetime import datetime
-from tkinter import messagebox
-from string import Template
-from typing import Dict, List, Optional, Any
-import html
+from itertools import compress
+from typing import Callable, Dict, Iterator, List, Optional, Any, Sequence, Tuple
+from email_feedback_app import funnel, instrumentation, ledger, rendering
+from email_feedback_app.assets import load_inline_assets
+from email_feedback_app.delivery import DeliveryBackend, OutlookBackend, backend_from_config, build_email_message
 
 
-def load_analysts_config() -> Dict[str, Any]:
+def _print_error(title: str, message: str) -> None:
+    print(f"[{title}] {message}", file=sys.stderr)
+
+_error_handler: Callable[[str, str], None] = _print_error
+
+def set_error_handler(handler: Optional[Callable[[str, str], None]]) -> None:
+    global _error_handler
+    _error_handler = handler or _print_error
+
+def report_error(title: str, message: str) -> None:
+    _error_handler(title, message)
+
+
+ANALYSTS_PATH = os.path.join("config", "analysts.json")
+
+AnalystIndex = Dict[str, Dict[str, Tuple[Optional[str], str, List[str]]]]
+
+_analysts_cache: Dict[str, Any] = {"path": None, "stamp": None, "config": None, "index": None}
+_adhoc_index: Dict[str, Any] = {"config": None, "index": None}
+
+
+def normalize_analyst_name(name: Any) -> str:
+    return " ".join(str(name or "").split()).casefold()
+
+def build_analyst_index(analysts_config: Dict[str, Any]) -> AnalystIndex:
+    # account -> normalized analyst name -> (email, group, cc_emails). When an analyst is listed in
+    # several groups the first one wins, as with the old scan over the groups.
+    index: AnalystIndex = {}
+    for account, account_data in analysts_config.items():
+        analysts = index.setdefault(account, {})
+        for group, group_data in account_data.get("groups", {}).items():
+            cc_emails = group_data.get("cc_emails", [])
+            for analyst, email in group_data.get("analysts", {}).items():
+                analysts.setdefault(normalize_analyst_name(analyst), (email, group, cc_emails))
+    return index
+
+def load_analysts_config(path: str = ANALYSTS_PATH) -> Dict[str, Any]:
+    # Parsed and indexed once; later calls only stat the file and return the cached config until it changes.
     try:
-        with open("config/analysts.json", "r", encoding="utf-8") as f:
-            return json.load(f)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if _analysts_cache["path"] == path and _analysts_cache["stamp"] == stamp:
+            return _analysts_cache["config"]
+        with open(path, "r", encoding="utf-8") as f:
+            analysts_config = json.load(f)
     except Exception as e:
-        messagebox.showerror("Error", f"Failed to load analysts config: {e}")
+        report_error("Error", f"Failed to load analysts config: {e}")
         return {}
+    _analysts_cache.update(path=path, stamp=stamp, config=analysts_config, index=build_analyst_index(analysts_config))
+    return analysts_config
+
+def get_analyst_index(analysts_config: Dict[str, Any]) -> AnalystIndex:
+    # The config returned by load_analysts_config maps to its prebuilt index; any other dict
+    # (e.g. one edited in memory) gets a one-slot cached index of its own.
+    for cache in (_analysts_cache, _adhoc_index):
+        if cache["config"] is analysts_config:
+            return cache["index"]
+    _adhoc_index.update(config=analysts_config, index=build_analyst_index(analysts_config))
+    return _adhoc_index["index"]
+
+def lookup_analyst(account: str, analyst_name: Any,
+                   analysts_config: Dict[str, Any]) -> Optional[Tuple[Optional[str], str, List[str]]]:
+    return get_analyst_index(analysts_config).get(account, {}).get(normalize_analyst_name(analyst_name))
 
 def get_email_config(account: str, analysts_config: Dict[str, Any]) -> Dict[str, Any]:
     return analysts_config.get(account, {})
 
-def is_valid_feedback(message: Optional[str]) -> bool:
-    return message and str(message).strip().lower() not in ["none", "", ".", "n/a"]
+INVALID_MESSAGES = frozenset(["none", "", ".", "n/a"])
 
-def load_existing_log_entries() -> pd.DataFrame:
-    log_file = os.path.join("logs", "approved_feedbacks.xlsx")
-    if os.path.exists(log_file):
-        return pd.read_excel(log_file)
-    return pd.DataFrame()
+
+def is_valid_feedback(message: Optional[str]) -> bool:
+    return message and str(message).strip().lower() not in INVALID_MESSAGES
+
+def load_existing_log_entries(include_archive: bool = False) -> pd.DataFrame:
+    entries = ledger.load_entries()
+    if include_archive:
+        archived = ledger.load_archived_entries()
+        if not archived.empty:
+            entries = pd.concat([archived, entries], ignore_index=True)
+    return entries
+
+NO_GROUP = "[No group]"
+
+
+def analyst_group(account: str, analyst_name: Any, analysts_config: Dict[str, Any]) -> str:
+    entry = lookup_analyst(account, analyst_name, analysts_config)
+    return entry[1] if entry is not None else NO_GROUP
+
+def load_kudos_stats(by: Sequence[str] = ("Account", "AnalystName"), accounts: Optional[List[str]] = None,
+                     since: Optional[str] = None, until: Optional[str] = None, status: Optional[str] = "Approved",
+                     analysts_config: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    # Served from the ledger's rollup table. "by" takes any of Account, AnalystName, Group, Month and
+    # Status; groups come from analysts.json, so moving an analyst regroups their history too.
+    rollups = ledger.load_rollups(accounts=accounts, since=since, until=until, status=status)
+    by = list(by)
+    if "Group" in by:
+        analysts_config = analysts_config if analysts_config is not None else load_analysts_config()
+        rollups["Group"] = [analyst_group(account, analyst, analysts_config)
+                            for account, analyst in zip(rollups["Account"], rollups["AnalystName"])]
+    if rollups.empty:
+        return pd.DataFrame(columns=by + ["Count"])
+    stats = rollups.groupby(by, as_index=False)["Count"].sum()
+    return stats.sort_values(["Count"] + by, ascending=[False] + [True] * len(by), ignore_index=True)
 
 def filter_and_process_feedbacks(feedback_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
-    log_file = os.path.join("logs", "approved_feedbacks.xlsx")
-    processed_keys = set()
+    key_index = None
 
-    if os.path.exists(log_file):
-        try:
-            log_df = pd.read_excel(log_file)
-            for _, row in log_df.iterrows():
-                processed_keys.add((row["Account"], str(row["TicketID"])))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to read log file: {e}")
+    try:
+        with instrumentation.span("dedupe.read_log") as span:
+            key_index = ledger.get_key_index()
+            span.add(rows_scanned=len(key_index))
+    except Exception as e:
+        report_error("Error", f"Failed to read log file: {e}")
 
     filtered_data = {}
     for account, entries in feedback_data.items():
-        filtered_data[account] = []
-        for entry in entries:
-            ticket_id = str(entry.get("ticket_id"))
-            if is_valid_feedback(entry.get("message")) and (account, ticket_id) not in processed_keys:
-                filtered_data[account].append(entry)
+        with instrumentation.span("dedupe.filter", account, rows_scanned=len(entries)) as span:
+            # The message rule goes first so invalid rows never reach hashing; the rest are
+            # anti-joined against the key index in one vectorized lookup per account.
+            valid = [entry for entry in entries if is_valid_feedback(entry.get("message"))]
+            if key_index is not None and valid:
+                logged = key_index.contains_many(account, [str(entry.get("ticket_id")) for entry in valid])
+                filtered_data[account] = list(compress(valid, ~logged))
+            else:
+                filtered_data[account] = valid
+            # Rejections still waiting in the write-behind buffer are not in the index yet.
+            pending = ledger.pending_ticket_ids(account)
+            if pending:
+                filtered_data[account] = [entry for entry in filtered_data[account]
+                                          if str(entry.get("ticket_id")) not in pending]
+            span.add(rows_kept=len(filtered_data[account]))
+        funnel.record_dedupe(account, len(entries), len(entries) - len(valid), len(valid) - len(filtered_data[account]),
+                             len(filtered_data[account]))
 
     return filtered_data
 
 def save_to_log(feedbacks: List[Dict[str, Any]], status: str = "Approved") -> bool:
-    log_file = os.path.join("logs", "approved_feedbacks.xlsx")
     try:
-        existing = pd.read_excel(log_file) if os.path.exists(log_file) else pd.DataFrame()
-
-        new_data = pd.DataFrame([{
-            "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "Account": fb["account"],
-            "TicketID": fb["ticket_id"],
-            "UserName": fb["user_name"],
-            "AnalystName": fb["analyst_name"],
-            "Message": fb["message"],
-            "Status": status
-        } for fb in feedbacks])
-
-        combined = pd.concat([existing, new_data], ignore_index=True)
-        combined.drop_duplicates(subset=["Account", "TicketID"], inplace=True)
-
-        combined.to_excel(log_file, index=False)
+        with instrumentation.span("log.save", rows_kept=len(feedbacks)):
+            ledger.append_entries(feedbacks, status=status)
         return True
 
     except Exception as e:
-        messagebox.showerror("Error", f"Failed to save to approved_feedbacks.xlsx: {e}")
+        report_error("Error", f"Failed to save to the feedback log: {e}")
         return False
 
-def render_html_template(feedback: Dict[str, Any]) -> tuple[str, str]:
+def export_log(xlsx_path: str = ledger.LOG_XLSX_PATH) -> bool:
     try:
-        with open("config/config.json", "r", encoding="utf-8") as f:
-            config_data = json.load(f)
-
-        template_language = config_data.get("template_language", "portuguese")
-        if template_language == "english":
-            template_file = "email_template_en.html"
-        elif template_language == "spanish":
-            template_file = "email_template_es.html"
-        else:
-            template_file = "email_template.html"
-
-        template_path = os.path.join("templates", template_file)
-        with open(template_path, "r", encoding="utf-8") as file:
-            html_template = Template(file.read())
-
-        raw_message = feedback.get("message", "")
-        sanitized_message = html.escape(str(raw_message))
-
-        filled_html = html_template.safe_substitute(
-            analyst_name=feedback.get("analyst_name", ""),
-            user_name=feedback.get("user_name", ""),
-            message=sanitized_message,
-            ticket_id=feedback.get("ticket_id", ""),
-            header_img_path=os.path.abspath("templates/assets/header.png"),
-            winner_img_path=os.path.abspath("templates/assets/Award-Winner.png"),
-        )
-
-        return filled_html, template_language
-
+        ledger.export_to_xlsx(xlsx_path)
+        return True
     except Exception as e:
-        raise RuntimeError(f"Failed to render email template: {e}")
-
-def generate_outlook_emails(feedbacks: List[Dict[str, Any]], analysts_config: Dict[str, Any],
-                            default_sender: str) -> bool:
-    try:
-        import win32com.client
-        outlook = win32com.client.Dispatch("Outlook.Application")
-
-        for feedback in feedbacks:
-            account = feedback["account"]
-            analyst_name = feedback["analyst_name"]
-            email_config = analysts_config.get(account, {})
-            groups = email_config.get("groups", {})
-
-            analyst_email = None
-            cc_emails = []
-
-            for group_data in groups.values():
-                analysts = group_data.get("analysts", {})
-                if analyst_name in analysts:
-                    analyst_email = analysts[analyst_name]
-                    cc_emails = group_data.get("cc_emails", [])
-                    break
-
-            mail = outlook.CreateItem(0)
-            mail.SentOnBehalfOfName = default_sender
-
-            html_body, template_language = render_html_template(feedback)
-
-            if template_language == "english":
-                mail.Subject = f"[{account}] Recognition of Excellent Service"
-            elif template_language == "spanish":
-                mail.Subject = f"[{account}] Reconocimiento de Servicio Excelente"
-            else:
-                mail.Subject = f"[{account}] Reconhecimento de Excelente Atendimento"
+        report_error("Error", f"Failed to export {xlsx_path}: {e}")
+        return False
 
-            mail.To = analyst_email or ""
-            mail.CC = "; ".join(cc_emails) if cc_emails else ""
-            mail.HTMLBody = html_body
+def render_html_template(feedback: Dict[str, Any]) -> tuple[str, str]:
+    with instrumentation.span("render", feedback.get("account")):
+        return _render_html_template(feedback)
 
-            mail.Save()
+def _render_html_template(feedback: Dict[str, Any]) -> tuple[str, str]:
+    try:
+        return rendering.render(feedback)
+    except Exception as e:
+        raise RuntimeError(f"Failed to render email template: {e}")
 
-        return True
+def resolve_recipients(account: str, analyst_name: str, analysts_config: Dict[str, Any]) -> Tuple[Optional[str], List[str]]:
+    entry = lookup_analyst(account, analyst_name, analysts_config)
+    if entry is None:
+        return None, []
+    return entry[0], entry[2]
+
+def render_many(feedbacks: List[Dict[str, Any]], config: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    # Bulk rendering for a whole batch; "render_workers" and "render_pool" come from config.json.
+    # Small batches stay in-process, where starting a pool would cost more than it saves.
+    config = config or {}
+    workers = rendering.resolve_render_workers(config) if len(feedbacks) > rendering.RENDER_CHUNK else 1
+    return rendering.render_many(feedbacks, workers, config.get("render_pool", "thread"))
+
+def deliver_many(feedbacks: List[Dict[str, Any]], analysts_config: Dict[str, Any], sender: str,
+                 backend: DeliveryBackend, config: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    # Renders on the pool and hands each message to an already opened backend as soon as it is ready.
+    # Yields one outcome per feedback, in input order, with either "target" or "error" set.
+    inline_assets = load_inline_assets()
+    for result in render_many(feedbacks, config):
+        feedback = result["feedback"]
+        outcome = {"index": result["index"], "feedback": feedback, "target": None, "error": None}
+        try:
+            if result["error"]:
+                raise RuntimeError(result["error"])
+            to, cc = resolve_recipients(feedback["account"], feedback["analyst_name"], analysts_config)
+            message = build_email_message(feedback, result["subject"], result["html"], to, cc, sender, inline_assets)
+            with instrumentation.span("deliver", feedback["account"]):
+                outcome["target"] = backend.send(message, feedback)
+        except Exception as e:
+            outcome["error"] = str(e)
+        yield outcome
 
+def generate_emails(feedbacks: List[Dict[str, Any]], analysts_config: Dict[str, Any], default_sender: str,
+                    config: Optional[Dict[str, Any]] = None, backend: Optional[DeliveryBackend] = None) -> bool:
+    try:
+        backend = backend or backend_from_config(config or {}, default="outlook")
+        with backend:
+            failures = [f"{outcome['feedback']['account']} / {outcome['feedback']['ticket_id']}: {outcome['error']}"
+                        for outcome in deliver_many(feedbacks, analysts_config, default_sender, backend, config)
+                        if outcome["error"]]
     except Exception as e:
-        messagebox.showerror("Error", f"Failed to generate Outlook drafts: {e}")
+        report_error("Error", f"Failed to generate emails: {e}")
+        return False
+
+    if failures:
+        report_error("Error", f"Failed to generate {len(failures)} of {len(feedbacks)} emails ({backend.name}):\n"
+                              + "\n".join(failures[:10]))
         return False
+    return True
+
+def generate_outlook_emails(feedbacks: List[Dict[str, Any]], analysts_config: Dict[str, Any],
+                            default_sender: str, config: Optional[Dict[str, Any]] = None) -> bool:
+    return generate_emails(feedbacks, analysts_config, default_sender, config, OutlookBackend())
 
 def load_config(path):
     with open(path, 'r', encoding='utf-8') as f:
@@ -1,8 +1,7 @@
 # main.py
 import os
+import sys
 import json
-from email_feedback_app.ui import FeedbackApp
-import tkinter as tk
 import warnings
 
 warnings.filterwarnings("ignore", category=UserWarning, message="Workbook contains no default style, apply openpyxl's default")
@@ -17,9 +16,18 @@ def main():
     with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
         config = json.load(f)
 
+    import tkinter as tk
+    from email_feedback_app import instrumentation
+    from email_feedback_app.ui import FeedbackApp
+
+    instrumentation.configure_from_config(config)
+
     root = tk.Tk()
     app = FeedbackApp(root, config)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--headless" in sys.argv[1:]:
+        from email_feedback_app.batch import main as batch_main
+        sys.exit(batch_main([arg for arg in sys.argv[1:] if arg != "--headless"]))
+    main()